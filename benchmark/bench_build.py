@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""
+Measure time required to build large scenarios
+
+Usage: python3 benchmark/bench_build.py [steps]
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+from timeit import default_timer
+
+from step_manager import StepManager
+
+
+def build_linear(count):
+    sm = StepManager()
+    for i in range(count):
+        sm.add_step("step_{}".format(i))
+    return sm
+
+
+def build_inserts(count):
+    sm = StepManager()
+    sm.add_step("first")
+    for i in range(count):
+        sm.add_step_after("first", "step_{}".format(i))
+    return sm
+
+
+def build_substeps(count):
+    sm = StepManager()
+    for i in range(count // 10):
+        sm.add_step("step_{}".format(i))
+        for j in range(10):
+            sm.add_substep("step_{}".format(i), "substep_{}".format(j))
+    return sm
+
+
+def lookup_all(count):
+    sm = build_linear(count)
+    for i in range(count):
+        sm.find_step_index("step_{}".format(i))
+    return sm
+
+
+def tailor(count):
+    sm = build_linear(count)
+    for i in range(0, count, 100):
+        sm.remove_range("step_{}".format(i), "step_{}".format(i + 49))
+        part = build_linear(50)
+        sm.splice_steps(part, after_step="step_{}".format(i + 50))
+    return sm
+
+
+def main(count):
+    for name, builder in [("add_step", build_linear), ("add_step_after", build_inserts),
+                          ("add_substep", build_substeps), ("find_step_index", lookup_all),
+                          ("remove/splice", tailor)]:
+        start = default_timer()
+        builder(count)
+        took = default_timer() - start
+        print("{name:<16} {count:>8} steps {took:>8.3f} s".format(name=name, count=count, took=took))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
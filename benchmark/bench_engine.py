@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+"""
+Benchmark suite of scenario building and scheduling engine. Every case is timed (best of
+repeats) and reported as operations per second, memory is measured separately as peak of
+traced allocations. Results can be saved as JSON and compared with results of other version
+
+Usage: python3 benchmark/bench_engine.py [--sizes 1000,10000,100000] [--repeat 3]
+                                         [--save results.json] [--compare baseline.json]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import gc
+import json
+import logging
+import platform
+import sys
+import tracemalloc
+from timeit import default_timer
+
+from step_manager import StepManager
+
+
+def run(sm):
+    try:
+        sm.run(timeout=3600, virtual=True)
+    except TypeError:
+        # Versions without virtual clock
+        sm.run(timeout=3600)
+
+
+def add_step(count):
+    sm = StepManager()
+    for i in range(count):
+        sm.add_step("step_{}".format(i))
+    return sm
+
+
+def add_step_after(count):
+    sm = StepManager()
+    sm.add_step("first")
+    for i in range(count):
+        sm.add_step_after("first", "step_{}".format(i))
+    return sm
+
+
+def add_substep(count):
+    sm = StepManager()
+    for i in range(count // 10):
+        sm.add_step("step_{}".format(i))
+        for j in range(10):
+            sm.add_substep("step_{}".format(i), "substep_{}".format(j))
+    return sm
+
+
+def edit_lookup(count):
+    """
+    Interleave appends and inserts at one place with index lookups of edited steps
+    """
+    sm = StepManager()
+    sm.add_step("first")
+    for i in range(count // 2):
+        sm.add_step("step_{}".format(i))
+        sm.find_step_index("step_{}".format(i))
+        sm.add_step_after("first", "inserted_{}".format(i))
+        sm.find_step_index("inserted_{}".format(i))
+    return sm
+
+
+def iteration(count):
+    """
+    Execute steps without action and duration, so time is spent by scheduling only
+    """
+    sm = add_step(count)
+    run(sm)
+    return sm
+
+
+def nesting(count):
+    """
+    Execute chain of nested substeps, every step has one substep
+    """
+    sm = StepManager()
+    step = sm.add_step("level_0")
+    for i in range(1, count):
+        step = step.add_substep("level_{}".format(i))
+    run(sm)
+    return sm
+
+
+def polling(count):
+    """
+    Execute step which expected passes on the last attempt
+    """
+    attempts = [0]
+
+    def poll():
+        attempts[0] += 1
+        return attempts[0] >= count
+
+    sm = StepManager()
+    sm.add_step("poll", attempts=count).add_expected(poll)
+    run(sm)
+    return sm
+
+
+def warnings(count):
+    """
+    Register warning in every substep and collect them from main step manager
+    """
+    sm = StepManager()
+    for i in range(count // 10):
+        step = sm.add_step("step_{}".format(i))
+        for j in range(10):
+            step.add_substep("substep_{}".format(j)).register_warning("warning {} {}".format(i, j))
+    sm.collect_warnings()
+    return sm
+
+
+CASES = [
+    ("add_step", add_step),
+    ("add_step_after", add_step_after),
+    ("add_substep", add_substep),
+    ("edit_lookup", edit_lookup),
+    ("iteration", iteration),
+    ("nesting", nesting),
+    ("polling", polling),
+    ("warnings", warnings),
+]
+
+
+def measure_time(func, count, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = default_timer()
+        result = func(count)
+        took = default_timer() - start
+        del result
+        if best is None or took < best:
+            best = took
+    return best
+
+
+def measure_memory(func, count):
+    gc.collect()
+    tracemalloc.start()
+    result = func(count)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def run_suite(sizes, repeat, cases):
+    for name, func in CASES:
+        if cases and name not in cases:
+            continue
+        for count in sizes:
+            took = measure_time(func, count, repeat)
+            peak = measure_memory(func, count)
+            result = {"case": name, "size": count, "seconds": took,
+                      "ops_per_sec": count / took if took > 0 else float("inf"), "peak_bytes": peak}
+            yield result
+
+
+def print_result(result, baseline=None):
+    line = "{case:<16} {size:>8} {seconds:>9.3f} s {ops_per_sec:>12.0f} ops/s {peak:>10.1f} KiB".format(
+        peak=result["peak_bytes"] / 1024.0, **result)
+    if baseline is not None:
+        line += "  x{speed:.2f} speed x{memory:.2f} memory".format(
+            speed=result["ops_per_sec"] / baseline["ops_per_sec"],
+            memory=float(result["peak_bytes"]) / max(baseline["peak_bytes"], 1))
+    print(line)
+    sys.stdout.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark step_manager scheduling engine")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated scenario sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="timing is best of repeats")
+    parser.add_argument("--case", action="append", dest="cases", help="run only given case, may be repeated")
+    parser.add_argument("--save", help="write results to JSON file")
+    parser.add_argument("--compare", help="JSON file of previous results to compare with")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    baseline = dict()
+    if args.compare:
+        with open(args.compare) as stream:
+            baseline = dict(((result["case"], result["size"]), result) for result in json.load(stream)["results"])
+
+    print("{case:<16} {size:>8} {seconds:>11} {ops:>18} {peak:>14}".format(
+        case="case", size="size", seconds="time", ops="speed", peak="peak memory"))
+    results = list()
+    for result in run_suite(sizes, args.repeat, args.cases):
+        print_result(result, baseline.get((result["case"], result["size"])))
+        results.append(result)
+
+    if args.save:
+        with open(args.save, "w") as stream:
+            json.dump({"python": platform.python_version(), "results": results}, stream, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""
+Measure logging overhead of building scenarios and polling expecteds while INFO and
+DEBUG messages are disabled
+
+Usage: python3 benchmark/bench_logging.py [attempts]
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+import sys
+from timeit import default_timer
+
+from step_manager import StepManager
+
+
+def check(**kwargs):
+    return False
+
+
+def build(count):
+    sm = StepManager()
+    for i in range(count):
+        sm.add_step("step_{}".format(i)).add_expected(check, user="user_{}".format(i))
+    return sm
+
+
+def poll(attempts):
+    sm = StepManager()
+    payload = dict(("key_{}".format(i), "value_{}".format(i)) for i in range(20))
+    step = sm.add_step("poll", action=check, attempts=attempts, **payload)
+    step.add_expected(check, **payload)
+    for _ in range(attempts):
+        step.run()
+    return step
+
+
+def main(count):
+    logging.basicConfig(level=logging.WARNING)
+    for name, func in [("add_step+expected", build), ("poll attempts", poll)]:
+        start = default_timer()
+        func(count)
+        took = default_timer() - start
+        print("{name:<18} {count:>8} {took:>8.3f} s".format(name=name, count=count, took=took))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+"""
+Measure memory used by large scenarios
+
+Usage: python3 benchmark/bench_memory.py [steps]
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import tracemalloc
+
+from step_manager import StepManager
+
+
+def check(**kwargs):
+    return True
+
+
+def build(count, expecteds):
+    sm = StepManager()
+    for i in range(count):
+        step = sm.add_step("step_{}".format(i), duration=1.0)
+        for j in range(expecteds):
+            step.add_expected(check, user="user")
+    return sm
+
+
+def measure(count, expecteds):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    sm = build(count, expecteds)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return sm, used
+
+
+def main(count):
+    for expecteds in (0, 1):
+        sm, used = measure(count, expecteds)
+        print("{count:>8} steps {expecteds} expected {total:>10.1f} KiB {per_step:>8.1f} bytes/step".format(
+            count=count, expecteds=expecteds, total=used / 1024.0, per_step=float(used) / count))
+        del sm
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""
+Compare construction of scenario by code with loading of the same scenario from file
+
+Usage: python3 benchmark/bench_scenario_file.py [steps]
+"""
+
+from __future__ import absolute_import, print_function
+
+import io
+import sys
+from timeit import default_timer
+
+from step_manager import StepManager, dump_scenario, load_scenario
+
+
+def action(**kwargs):
+    pass
+
+
+def check(**kwargs):
+    return True
+
+
+def build(count):
+    sm = StepManager()
+    for i in range(count):
+        step = sm.add_step("step_{}".format(i), action=action, duration=0.1, user="user_{}".format(i))
+        step.add_expected(check, user="user_{}".format(i))
+        if i % 10 == 0:
+            step.add_substep("substep_{}".format(i), action=action)
+    return sm
+
+
+def main(count):
+    start = default_timer()
+    sm = build(count)
+    built = default_timer() - start
+
+    stream = io.StringIO()
+    start = default_timer()
+    dump_scenario(sm, stream)
+    dumped = default_timer() - start
+
+    text = stream.getvalue()
+    start = default_timer()
+    load_scenario(io.StringIO(text))
+    loaded = default_timer() - start
+
+    print("{count} steps, file size {size:.1f} KiB".format(count=count, size=len(text) / 1024.0))
+    for name, took in [("construct", built), ("dump", dumped), ("load", loaded)]:
+        print("{name:<10} {took:>8.3f} s".format(name=name, took=took))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,81 @@
+#
+
+from __future__ import absolute_import
+
+import asyncio
+
+
+class AsyncioReactor(object):
+    """
+    Reactor interface (call_later, seconds, stop) implemented on top of running asyncio loop
+
+    Exception raised by scheduled callback stops the reactor and is raised from `wait`,
+    callbacks scheduled before stop are dropped.
+    """
+
+    def __init__(self, loop=None):
+        self._loop = loop or asyncio.get_event_loop()
+        self._start = self._loop.time()
+        self._done = self._loop.create_future()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    @property
+    def stopped(self):
+        return self._done.done()
+
+    def seconds(self):
+        return self._loop.time() - self._start
+
+    def call_later(self, delay, callback):
+        return self._loop.call_later(max(delay, 0.0), self._call, callback)
+
+    def call_when_done(self, future, callback):
+        """
+        Call callback with reactor once concurrent or asyncio future is done
+        """
+        if not asyncio.isfuture(future):
+            future = asyncio.wrap_future(future, loop=self._loop)
+        future.add_done_callback(lambda f: self._loop.call_soon(self._call, callback))
+
+    def stop(self):
+        if not self._done.done():
+            self._done.set_result(None)
+
+    def _call(self, callback):
+        if self._done.done():
+            return
+        try:
+            callback(self)
+        except Exception as err:
+            self._done.set_exception(err)
+
+    async def wait(self, timeout):
+        """
+        Wait until reactor is stopped or timeout is expired
+
+        :return: True if reactor was stopped before timeout
+        """
+        try:
+            await asyncio.wait_for(asyncio.shield(self._done), timeout)
+        except asyncio.TimeoutError:
+            self.stop()
+            return False
+        return True
+
+
+def schedule_awaitable(awaitable):
+    """
+    Schedule coroutine returned by action or expected on running asyncio loop
+
+    :rtype: asyncio.Future
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        if hasattr(awaitable, "close"):
+            awaitable.close()
+        raise TypeError("Coroutine actions and expecteds are supported only by StepManager.run_async")
+    return asyncio.ensure_future(awaitable, loop=loop)
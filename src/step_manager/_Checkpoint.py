@@ -0,0 +1,157 @@
+#
+
+from __future__ import absolute_import
+
+import json
+import os
+
+from ._Notice import Notice
+from ._ParallelGroup import ParallelGroup
+
+CHECKPOINT_VERSION = 1
+
+
+class Checkpoint(object):
+    """
+    Periodic saving of run state of step manager tree, see StepManager.set_checkpoint
+
+    @ivar StepManager sm: main step manager which state is saved
+    @ivar float interval: minimal reactor time between saves, state is checked when step finishes
+    """
+
+    def __init__(self, sm, path, interval=60.0):
+        self.sm = sm
+        self.path = path
+        self.interval = interval
+        self._last = 0.0
+
+    def step_finished(self, now):
+        if now - self._last >= self.interval:
+            self.save(now)
+
+    def save(self, now):
+        self._last = now
+        write_checkpoint(self.sm, self.path)
+
+
+def _keys(steps):
+    """
+    Yield steps with keys which identify them between runs: name and number of step with the same name
+    """
+    seen = dict()
+    for step in steps:
+        occurrence = seen.get(step.name, 0)
+        seen[step.name] = occurrence + 1
+        yield "{name}#{occurrence}".format(name=step.name, occurrence=occurrence), step
+
+
+def _notices(records, path):
+    return [[notice.level, notice.message, notice.timestamp] for notice in records if notice.path == path]
+
+
+def _serializable(value):
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _context(sm):
+    return dict((key, value) for key, value in sm._context.items() if _serializable(value))
+
+
+def _records(steps):
+    result = dict()
+    for key, step in _keys(steps):
+        if step.stop_time is None:
+            continue
+        record = {
+            "state": step.state,
+            "start_time": step.start_time,
+            "stop_time": step.stop_time,
+            "attempts": step.attempts_used,
+            "notices": _notices(step.get_warning_records() + step.get_alert_records(), (step.name,)),
+        }
+        if isinstance(step, ParallelGroup):
+            record["children"] = _records(step.children)
+        if step.sm is not None:
+            record["substeps"] = _records(step.sm._steps)
+            record["context"] = _context(step.sm)
+        result[key] = record
+    return result
+
+
+def checkpoint_state(sm):
+    """
+    Run state of step manager tree: finished steps with states, times and notices, notices of
+    step manager and context values of it and substeps managers which can be written as JSON
+    """
+    return {
+        "version": CHECKPOINT_VERSION,
+        "completed": sm.completed,
+        "notices": _notices(sm.get_warning_records() + sm.get_alert_records(), ()),
+        "context": _context(sm),
+        "steps": _records(sm._steps),
+    }
+
+
+def write_checkpoint(sm, path):
+    """
+    Write run state to file, file is replaced atomically so it is never left half written
+    """
+    temp_path = "{path}.tmp".format(path=path)
+    with open(temp_path, "w") as stream:
+        json.dump(checkpoint_state(sm), stream)
+    os.replace(temp_path, path)
+
+
+def read_checkpoint(path):
+    with open(path) as stream:
+        data = json.load(stream)
+    if data.get("version") != CHECKPOINT_VERSION:
+        raise ValueError("Unsupported checkpoint version {version}".format(version=data.get("version")))
+    return data
+
+
+def _restore_step(step, record):
+    step._state = record["state"]
+    step.start_time = record["start_time"]
+    step.stop_time = record["stop_time"]
+    step._attempts_used = record["attempts"]
+    step.start_info_provided = True
+    for level, message, timestamp in record["notices"]:
+        step._add_notice(Notice(path=(step.name,), message=message, level=level, timestamp=timestamp))
+    if step.sm is not None:
+        step.sm._context.update(record.get("context", {}))
+    if isinstance(step, ParallelGroup):
+        for key, child in _keys(step.children):
+            if key in record["children"]:
+                _restore_step(child, record["children"][key])
+
+
+def _restore_steps(sm, records):
+    """
+    :return: True if step manager has steps which should be executed
+    """
+    for key, step in _keys(list(sm._steps)):
+        record = records.get(key)
+        if record is None:
+            continue
+        _restore_step(step, record)
+        sm._not_started.pop(step, None)
+        if step.sm is not None and _restore_steps(step.sm, record.get("substeps", {})):
+            sm._resumed.add(step)
+    return len(sm._not_started) > 0 or len(sm._resumed) > 0
+
+
+def restore_checkpoint(sm, data):
+    """
+    Apply run state to step manager built with the same steps. Steps are matched by names and
+    order of steps with the same name. Finished steps are marked as not to be executed again,
+    finished steps with unfinished substeps are marked to continue with substeps
+    """
+    sm._context.update(data["context"])
+    for level, message, timestamp in data["notices"]:
+        sm._notice_registered(Notice(path=(), message=message, level=level, timestamp=timestamp))
+    _restore_steps(sm, data["steps"])
@@ -0,0 +1,140 @@
+#
+
+from __future__ import absolute_import
+
+from threading import RLock
+
+_MISSING = object()
+
+
+class _Shared(object):
+    """
+    State shared by all contexts of one tree: lock and write counters of keys
+    """
+
+    __slots__ = ("lock", "versions")
+
+    def __init__(self):
+        self.lock = RLock()
+        self.versions = dict()
+
+
+class _Lazy(object):
+
+    __slots__ = ("factory", "kwargs")
+
+    def __init__(self, factory, kwargs):
+        self.factory = factory
+        self.kwargs = kwargs
+
+
+class Context(object):
+    """
+    Values stored by scenario. Context of substeps manager sees values of parent contexts,
+    values set in it are visible only to it and its children
+
+    Resolved values are cached per context and validated with write counter of the key, so
+    repeated lookup does not depend on nesting depth. Writes and evaluation of lazy values are
+    made under lock shared by the whole tree, so contexts may be used by actions run in threads.
+    """
+
+    def __init__(self, parent=None):
+        self._parent = None
+        self._values = dict()
+        self._cache = dict()
+        self._shared = _Shared()
+        if parent is not None:
+            self.set_parent(parent)
+
+    def set_parent(self, parent):
+        """
+        :param Context parent: context which values are visible from this one, None for root
+        """
+        with self._shared.lock:
+            self._parent = parent
+            self._shared = _Shared() if parent is None else parent._shared
+            self._cache = dict()
+
+    def get(self, key, default=None):
+        """
+        Value of key set in this context or the nearest parent, lazy value is evaluated on first get
+        """
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == self._shared.versions.get(key, 0):
+            value = cached[1]
+        else:
+            value = self._resolve(key)
+        return default if value is _MISSING else value
+
+    def _resolve(self, key):
+        with self._shared.lock:
+            version = self._shared.versions.get(key, 0)
+            value = _MISSING
+            context = self
+            while context is not None:
+                value = context._values.get(key, _MISSING)
+                if value is not _MISSING:
+                    break
+                context = context._parent
+            if isinstance(value, _Lazy):
+                value = value.factory(**value.kwargs)
+                # Evaluated value replaces lazy one, so it is visible to all contexts without new version
+                context._values[key] = value
+            self._cache[key] = (version, value)
+            return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key, value):
+        with self._shared.lock:
+            self._values[key] = value
+            self._shared.versions[key] = self._shared.versions.get(key, 0) + 1
+
+    def set_lazy(self, key, factory, **kwargs):
+        """
+        Set value which is computed by factory called with kwargs on first get
+        """
+        self.set(key, _Lazy(factory, kwargs))
+
+    def add_to_list(self, key, value):
+        """
+        Append value to visible list, list is created in this context if key is missing
+        """
+        with self._shared.lock:
+            container = self.get(key, _MISSING)
+            if container is _MISSING:
+                self.set(key, [value])
+            else:
+                container.append(value)
+
+    def add_to_dict(self, key, dict_key, value):
+        """
+        Set item of visible dict, dict is created in this context if key is missing
+        """
+        with self._shared.lock:
+            container = self.get(key, _MISSING)
+            if container is _MISSING:
+                self.set(key, {dict_key: value})
+            else:
+                container[dict_key] = value
+
+    def items(self):
+        """
+        Evaluated values set in this context
+        """
+        with self._shared.lock:
+            return [(key, value) for key, value in self._values.items() if not isinstance(value, _Lazy)]
+
+    def update(self, values):
+        for key, value in values.items():
+            self.set(key, value)
+
+    def copy(self):
+        """
+        Context without parent with values set in this one
+        """
+        context = Context()
+        with self._shared.lock:
+            context._values = dict(self._values)
+        return context
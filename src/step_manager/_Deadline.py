@@ -0,0 +1,79 @@
+#
+
+from __future__ import absolute_import
+
+
+class Deadline(object):
+    """
+    Time limit of step enforced by step manager watchdog in reactor time, so it is deterministic
+    with virtual clock. Action running synchronously can't be interrupted, deadline is handled
+    once it returns control to reactor
+
+    @ivar float seconds: limit since step start
+    @ivar bool substeps: limit covers substeps of step too
+    @ivar bool skip: cancel step and continue with next step when limit is exceeded
+    """
+
+    def __init__(self, seconds, substeps=False, skip=False):
+        self.seconds = seconds
+        self.substeps = substeps
+        self.skip = skip
+
+    @classmethod
+    def create(cls, deadline):
+        """
+        :param deadline: Deadline, seconds or None
+        """
+        if deadline is None or isinstance(deadline, Deadline):
+            return deadline
+        return cls(deadline)
+
+    def is_met(self, step):
+        """
+        :return: True if step (and its substeps) are finished
+        """
+        if step.stop_time is None:
+            return False
+        return not self.substeps or step.sm is None or step.sm.completed
+
+
+class DeadlineRecord(object):
+    """
+    Step which exceeded its deadline
+
+    @ivar tuple path: names of steps from main step manager down to the step
+    @ivar float elapsed: reactor time since step start when deadline was detected
+    @ivar int attempts: attempts made by step
+    @ivar bool skipped: step was cancelled and scenario continued with next step
+    """
+
+    def __init__(self, path, seconds, elapsed, attempts, skipped):
+        self.path = path
+        self.seconds = seconds
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.skipped = skipped
+
+    def __repr__(self):
+        return "DeadlineRecord(path={path!r}, seconds={seconds!r}, elapsed={elapsed:.3f}, attempts={attempts!r}, " \
+               "skipped={skipped!r})".format(path=self.path, seconds=self.seconds, elapsed=self.elapsed,
+                                             attempts=self.attempts, skipped=self.skipped)
+
+
+class _Watchdog(object):
+    """
+    Continuation of step guarded by deadline, it is called once: when step is finished or when
+    step is skipped because of deadline
+    """
+
+    __slots__ = ("_then", "finished")
+
+    def __init__(self, then):
+        self._then = then
+        self.finished = False
+
+    def __call__(self, reactor):
+        if self.finished:
+            return
+        self.finished = True
+        self._then(reactor)
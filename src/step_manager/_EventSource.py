@@ -0,0 +1,26 @@
+#
+
+from __future__ import absolute_import
+
+
+class EventSource(object):
+    """
+    Simple publisher which event expecteds subscribe to
+
+    notify should be called on reactor loop (e.g. from action, another step or via
+    loop.call_soon_threadsafe when events come from other thread)
+    """
+
+    def __init__(self):
+        self._subscribers = list()
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def notify(self, *args, **kwargs):
+        for callback in list(self._subscribers):
+            callback(*args, **kwargs)
@@ -1,31 +1,116 @@
 from __future__ import absolute_import
 
 import logging
+from copy import copy
+from inspect import isawaitable
+
+from ._AsyncioReactor import schedule_awaitable
 
 
 class Expected(object):
 
-    def __init__(self, owner, method, should_return=True, is_alert=False, **kwargs):
+    __slots__ = ("owner", "_method", "_should_return", "is_alert", "_kwargs", "_executor", "_future", "retry",
+                 "attempts", "settled", "due", "_cache_ttl", "_cache_key", "__info_provided")
+
+    def __init__(self, owner, method, should_return=True, is_alert=False, executor=None, retry=None, cache_ttl=None,
+                 **kwargs):
         self.owner = owner
-        self.log = owner.log
         self._method = method
         self._should_return = should_return
         self.is_alert = is_alert
-        self._kwargs = dict(**kwargs)
+        self._kwargs = kwargs
+        self._executor = executor
+        self.retry = retry
+        self._cache_ttl = cache_ttl
+        self._cache_key = None
+        self._reset()
+
+    def _reset(self):
+        self._future = None
+        self.attempts = 0
+        self.settled = False
+        self.due = None
         self.__info_provided = False
 
-    def run(self):
-        if hasattr(self._method, "__name__"):
-            method_name = self._method.__name__
-        else:
-            method_name = self._method
+    def clone(self, owner):
+        """
+        Copy expected without check state, method kwargs are shared
+
+        :param owner: step of the copy
+        """
+        expected = copy(self)
+        expected.owner = owner
+        expected._reset()
+        return expected
+
+    @property
+    def log(self):
+        return self.owner.log
 
+    def open(self):
+        """
+        Called when step owning expected is started
+        """
+        pass
+
+    def close(self):
+        """
+        Called when expected is settled
+        """
+        pass
+
+    def set_waker(self, waker):
+        """
+        Set callback which resumes step before retry interval is expired
+        """
+        pass
+
+    @property
+    def pending(self):
+        """
+        Future of check submitted to executor and not collected yet
+        """
+        return self._future
+
+    def run(self, now=None):
+        """
+        :param now: reactor time, used for cached results
+        :return: tuple of check result and message or None if check is still running in executor
+            or as coroutine
+        """
         if not self.__info_provided:
             self.__info_provided = True
-            self.log(logging.INFO, ".Check expected '{method}' with params {params}".
-                     format(method=method_name, params=self._kwargs))
+            self.log(logging.INFO, ".Check expected '{method}' with params {params}",
+                     method=getattr(self._method, "__name__", self._method), params=self._kwargs)
+
+        res = None
+        cache = None
+        if self._cache_ttl is not None:
+            cache = self.owner.get_expected_cache()
+            if self._cache_key is None:
+                self._cache_key = cache.make_key(self._method, self._kwargs)
+            if self._future is None and self._cache_key is not None:
+                found, cached = cache.get(self._cache_key, now)
+                if found:
+                    self.log(logging.DEBUG, ".Cached result of expected used")
+                    return self._evaluate(cached)
+        if self._future is None:
+            if self._executor is None:
+                res = self._method(**self._kwargs)
+                if isawaitable(res):
+                    self._future = schedule_awaitable(res)
+            else:
+                self._future = self.owner.get_executor(self._executor).submit(self._method, **self._kwargs)
+        if self._future is not None:
+            if not self._future.done():
+                return None
+            future, self._future = self._future, None
+            res = future.result()
+        if cache is not None and self._cache_key is not None:
+            cache.put(self._cache_key, now, self._cache_ttl, res)
+        return self._evaluate(res)
 
-        res = self._method(**self._kwargs)
+    def _evaluate(self, res):
         if not isinstance(res, tuple):
             res = (res, '')
         msg = res[1] if res[1] else "No message provided"
@@ -34,3 +119,62 @@ class Expected(object):
         else:
             self.log(logging.INFO, ".Check of expected passed")
             return True, ""
+
+
+class EventExpected(Expected):
+    """
+    Expected which passes once event matching predicate is published by event source
+
+    Source is subscribed when step is started, so events published by step action are not missed.
+    Step waiting for retry is woken up immediately when matching event arrives.
+    """
+
+    __slots__ = ("_source", "_predicate", "_message", "_matched", "_subscribed", "_waker")
+
+    def __init__(self, owner, source, predicate=None, message="Expected event was not received", **kwargs):
+        super(EventExpected, self).__init__(owner, self._check, **kwargs)
+        self._source = source
+        self._predicate = predicate
+        self._message = message
+        self._matched = False
+        self._subscribed = False
+        self._waker = None
+
+    def _reset(self):
+        super(EventExpected, self)._reset()
+        self._matched = False
+        self._subscribed = False
+        self._waker = None
+
+    def clone(self, owner):
+        expected = super(EventExpected, self).clone(owner)
+        expected._method = expected._check
+        return expected
+
+    def _check(self):
+        if self._matched:
+            return True
+        return False, self._message
+
+    def _on_event(self, *args, **kwargs):
+        if self._matched:
+            return
+        if self._predicate is None or self._predicate(*args, **kwargs):
+            self._matched = True
+            waker, self._waker = self._waker, None
+            if waker is not None:
+                waker()
+
+    def open(self):
+        if not self._subscribed:
+            self._subscribed = True
+            self._source.subscribe(self._on_event)
+
+    def close(self):
+        if self._subscribed:
+            self._subscribed = False
+            self._source.unsubscribe(self._on_event)
+        self._waker = None
+
+    def set_waker(self, waker):
+        self._waker = waker
@@ -0,0 +1,63 @@
+#
+
+from __future__ import absolute_import
+
+import time
+
+
+class ExpectedCache(object):
+    """
+    Results of expected methods keyed by method and kwargs, each entry lives for TTL seconds of
+    reactor time (monotonic clock if expected is run without reactor time). Shared by main step
+    manager with all its substeps managers
+    """
+
+    def __init__(self):
+        self._entries = dict()
+
+    @staticmethod
+    def make_key(method, kwargs):
+        """
+        :return: hashable key or None if kwargs can not be hashed
+        """
+        key = (method, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key, now):
+        """
+        :return: tuple (found, result)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, result = entry
+        if now is None:
+            now = time.monotonic()
+        if now >= expires:
+            del self._entries[key]
+            return False, None
+        return True, result
+
+    def put(self, key, now, ttl, result):
+        if now is None:
+            now = time.monotonic()
+        self._entries[key] = (now + ttl, result)
+
+    def invalidate(self, method=None, **kwargs):
+        """
+        Drop cached results: all of them, all results of method or single result of method with kwargs
+        """
+        if method is None:
+            self._entries.clear()
+        elif kwargs:
+            self._entries.pop(self.make_key(method, kwargs), None)
+        else:
+            for key in [key for key in self._entries if key[0] == method]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
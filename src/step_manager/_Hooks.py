@@ -0,0 +1,161 @@
+#
+
+from __future__ import absolute_import
+
+import csv
+import json
+
+
+class StepHook(object):
+    """
+    Base class for instrumentation hooks registered with StepManager.add_hook
+
+    Times are reactor times (seconds since run start), action and expected durations are
+    wall clock seconds spent in the call. Hooks are shared with substeps managers.
+    """
+
+    def on_step_start(self, step, time):
+        pass
+
+    def on_attempt_start(self, step, attempt, time):
+        pass
+
+    def on_action(self, step, seconds):
+        pass
+
+    def on_expected(self, step, expected, passed, seconds):
+        pass
+
+    def on_attempt_stop(self, step, attempt, time):
+        pass
+
+    def on_wait(self, step, reason, delay):
+        """
+        :param reason: "interval" before next attempt or "duration" before next step. Interval wait
+            is reported when step resumes, delay is actual time waited (event may wake step earlier)
+        """
+        pass
+
+    def on_step_stop(self, step, time):
+        pass
+
+
+class _StepTiming(object):
+
+    def __init__(self, step, start):
+        self.path = "/".join(step.path)
+        self.name = step.name
+        self.state = step.state
+        self.start = start
+        self.stop = None
+        self.action_seconds = 0.0
+        self.expected_seconds = 0.0
+        self.interval_wait = 0.0
+        self.duration_wait = 0.0
+        self.attempts = list()
+
+    @property
+    def seconds(self):
+        if self.stop is None:
+            return 0.0
+        return self.stop - self.start
+
+    @property
+    def waiting(self):
+        """
+        Time between step start and stop not spent in action or expecteds plus duration after step
+        """
+        busy = self.action_seconds + self.expected_seconds
+        return max(self.seconds - busy, 0.0) + self.duration_wait
+
+    def as_dict(self):
+        return {
+            "path": self.path,
+            "name": self.name,
+            "state": self.state,
+            "start": self.start,
+            "stop": self.stop,
+            "seconds": self.seconds,
+            "attempts": len(self.attempts),
+            "action_seconds": self.action_seconds,
+            "expected_seconds": self.expected_seconds,
+            "interval_wait": self.interval_wait,
+            "duration_wait": self.duration_wait,
+            "waiting": self.waiting,
+            "attempt_timings": [dict(attempt) for attempt in self.attempts],
+        }
+
+
+class TimingCollector(StepHook):
+    """
+    Hook which records per step and per attempt timings and exports them as JSON or CSV
+    """
+
+    CSV_FIELDS = ["path", "name", "state", "start", "stop", "seconds", "attempts", "action_seconds",
+                  "expected_seconds", "interval_wait", "duration_wait", "waiting",
+                  "attempt", "attempt_start", "attempt_stop", "attempt_action_seconds", "attempt_expected_seconds"]
+
+    def __init__(self):
+        self._timings = dict()
+        self._order = list()
+
+    def _current(self, step):
+        return self._timings[step].attempts[-1]
+
+    def on_step_start(self, step, time):
+        timing = _StepTiming(step, time)
+        self._timings[step] = timing
+        self._order.append(timing)
+
+    def on_attempt_start(self, step, attempt, time):
+        self._timings[step].attempts.append({"attempt": attempt, "start": time, "stop": None,
+                                             "action_seconds": 0.0, "expected_seconds": 0.0})
+
+    def on_action(self, step, seconds):
+        self._timings[step].action_seconds += seconds
+        self._current(step)["action_seconds"] += seconds
+
+    def on_expected(self, step, expected, passed, seconds):
+        self._timings[step].expected_seconds += seconds
+        self._current(step)["expected_seconds"] += seconds
+
+    def on_attempt_stop(self, step, attempt, time):
+        self._current(step)["stop"] = time
+
+    def on_wait(self, step, reason, delay):
+        timing = self._timings[step]
+        if reason == "interval":
+            timing.interval_wait += delay
+        else:
+            timing.duration_wait += delay
+
+    def on_step_stop(self, step, time):
+        timing = self._timings[step]
+        timing.stop = time
+        timing.state = step.state
+
+    def get_timings(self):
+        """
+        :return: list of dicts with step timings in order of step start
+        """
+        return [timing.as_dict() for timing in self._order]
+
+    def to_json(self, stream):
+        json.dump(self.get_timings(), stream, indent=1)
+
+    def to_csv(self, stream):
+        """
+        Write one row per attempt, steps without attempts (groups) are written as single row
+        """
+        writer = csv.DictWriter(stream, fieldnames=self.CSV_FIELDS)
+        writer.writeheader()
+        for timing in self.get_timings():
+            attempts = timing.pop("attempt_timings")
+            for attempt in attempts or [dict()]:
+                row = dict(timing)
+                row["attempt"] = attempt.get("attempt")
+                row["attempt_start"] = attempt.get("start")
+                row["attempt_stop"] = attempt.get("stop")
+                row["attempt_action_seconds"] = attempt.get("action_seconds")
+                row["attempt_expected_seconds"] = attempt.get("expected_seconds")
+                writer.writerow(row)
@@ -0,0 +1,42 @@
+#
+
+from __future__ import absolute_import
+
+from time import time
+
+
+class Notice(object):
+    """
+    Warning or alert registered during scenario execution
+
+    @ivar tuple path: names of steps from the step manager which holds notice down to the step which registered it
+    @ivar str message: notice message
+    @ivar str level: Notice.WARNING or Notice.ALERT
+    @ivar float timestamp: wall clock time of registration
+    """
+
+    WARNING = "warning"
+    ALERT = "alert"
+
+    __slots__ = ("path", "message", "level", "timestamp")
+
+    def __init__(self, path, message, level=WARNING, timestamp=None):
+        self.path = path
+        self.message = message
+        self.level = level
+        self.timestamp = time() if timestamp is None else timestamp
+
+    def prefixed(self, name):
+        """
+        Return same notice as seen from parent step with given name
+        """
+        return Notice(path=(name,) + self.path, message=self.message, level=self.level, timestamp=self.timestamp)
+
+    def __str__(self):
+        if not self.path:
+            return str(self.message)
+        return "{path}: {message}".format(path=": ".join(self.path), message=self.message)
+
+    def __repr__(self):
+        return "Notice(path={path!r}, message={message!r}, level={level!r})".format(
+            path=self.path, message=self.message, level=self.level)
@@ -0,0 +1,112 @@
+#
+
+from __future__ import absolute_import
+
+from ._Step import State, Step
+
+
+class ParallelGroup(Step):
+    """
+    Step which children are started together and executed concurrently on the same reactor
+
+    Group is finished when all children are finished or, with fail_fast, when first child
+    finishes in state other than passed. Every child keeps its own attempts, interval,
+    duration and substeps.
+
+    @ivar list _children: child steps in order of registration
+    """
+
+    __slots__ = ("fail_fast", "_children", "_running", "_finished")
+
+    SEVERITY = [State.UNKNOWN, State.PASS, State.WARN, State.FAIL, State.BROK]
+
+    def __init__(self, owner, name, duration=0.0, fail_fast=False, deadline=None, depends_on=None):
+        super(ParallelGroup, self).__init__(owner=owner, name=name, action=None, duration=duration, deadline=deadline,
+                                            depends_on=depends_on)
+        self.fail_fast = fail_fast
+        self._children = list()
+        self._running = 0
+        self._finished = False
+
+    def clone(self, owner):
+        group = super(ParallelGroup, self).clone(owner)
+        group._children = [child.clone(group) for child in self._children]
+        group._running = 0
+        group._finished = False
+        return group
+
+    @property
+    def children(self):
+        return list(self._children)
+
+    def log_enabled(self, level):
+        return self._owner.log_enabled(level)
+
+    @property
+    def instrumented(self):
+        return self._owner.instrumented
+
+    def _emit(self, event, *args):
+        self._owner._emit(event, *args)
+
+    def get_path(self):
+        return self.path
+
+    def createStepManager(self):
+        return self._owner.createStepManager()
+
+    def _notice_registered(self, notice):
+        self._add_notice(notice.prefixed(self.name))
+
+    def add_step(self, name, action=None, duration=0.0, interval=0, attempts=1, throw_except=False, executor=None,
+                 retry=None, deadline=None, depends_on=None, **kwargs):
+        """
+        :raise ValueError: depends_on is given, all children of group are started together
+        """
+        if depends_on is not None:
+            raise ValueError("Step {name} of parallel group {group} can not depend on other steps, all children "
+                             "are started together".format(name=name, group=self.name))
+        step = Step(owner=self, name=name, action=action, duration=duration, interval=interval, attempts=attempts,
+                    throw_except=throw_except, executor=executor, retry=retry, deadline=deadline, **kwargs)
+        self._children.append(step)
+        return step
+
+    def find_step(self, name):
+        for step in self._children:
+            if step.name == name:
+                return step
+        raise Exception("No step with name {name} found in group {group}".format(name=name, group=self.name))
+
+    def start(self):
+        """
+        Prepare group for execution and return children to be started
+        """
+        self._running = len(self._children)
+        self._finished = False
+        self._state = State.PASS
+        return list(self._children)
+
+    def child_finished(self, child):
+        """
+        Account finished child
+
+        :return: True if whole group is finished by this child
+        """
+        if self._finished:
+            return False
+        self._running -= 1
+        if self.SEVERITY.index(child.state) > self.SEVERITY.index(self._state):
+            self._state = child.state
+        if self._running == 0 or (self.fail_fast and child.state != State.PASS):
+            self._finished = True
+            if self._running > 0:
+                for step in self._children:
+                    if step is not child:
+                        step.cancel()
+            return True
+        return False
+
+    def cancel(self):
+        super(ParallelGroup, self).cancel()
+        for step in self._children:
+            step.cancel()
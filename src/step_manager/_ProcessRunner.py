@@ -0,0 +1,351 @@
+#
+
+from __future__ import absolute_import
+
+import json
+import logging
+import multiprocessing
+import os
+import unittest
+from collections import deque
+from multiprocessing.connection import wait
+from timeit import default_timer
+
+from ._Hooks import StepHook
+from ._Reporter import step_record
+from ._ScenarioFile import LazyCallable, load_scenario
+
+
+class ScenarioTask(object):
+    """
+    Scenario which can be built in worker process
+
+    @ivar str kind: "test" for StepTestCase id, "file" for scenario file written by dump_scenario,
+        "factory" for import path of function returning StepManager
+    """
+
+    TEST = "test"
+    FILE = "file"
+    FACTORY = "factory"
+
+    def __init__(self, kind, target, name=None, timeout=None):
+        self.kind = kind
+        self.target = target
+        self.name = target if name is None else name
+        self.timeout = timeout
+
+    def build(self, timeout):
+        """
+        :return: step manager and its timeout
+        """
+        if self.kind == self.TEST:
+            case = next(iter(_flatten(unittest.defaultTestLoader.loadTestsFromName(self.target))))
+            return case.createScenario(), getattr(case, "TIMEOUT", timeout)
+        if self.kind == self.FILE:
+            with open(self.target) as stream:
+                return load_scenario(stream), timeout
+        if self.kind == self.FACTORY:
+            return LazyCallable(self.target)(), timeout
+        raise ValueError("Unknown scenario kind {kind}".format(kind=self.kind))
+
+
+class RemoteScenarioResult(object):
+    """
+    Outcome of scenario executed in worker process
+
+    @ivar list steps: records of finished steps (see JsonLinesReporter) in order of finish
+    @ivar str error: repr of exception raised while scenario was built or run
+    @ivar list regressions: TimingRegression of scenario and its steps if runner has history
+    """
+
+    def __init__(self, name, worker=None):
+        self.name = name
+        self.worker = worker
+        self.completed = False
+        self.seconds = 0.0
+        self.warnings = list()
+        self.alerts = list()
+        self.error = None
+        self.steps = list()
+        self.regressions = list()
+
+    @property
+    def passed(self):
+        return self.completed and self.error is None and len(self.warnings) == 0
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "worker": self.worker,
+            "passed": self.passed,
+            "completed": self.completed,
+            "seconds": self.seconds,
+            "warnings": self.warnings,
+            "alerts": self.alerts,
+            "error": self.error,
+            "steps": self.steps,
+        }
+
+    def __repr__(self):
+        return "RemoteScenarioResult(name={name!r}, passed={passed!r}, seconds={seconds:.3f})".format(
+            name=self.name, passed=self.passed, seconds=self.seconds)
+
+
+class CombinedResult(object):
+    """
+    Results of all scenarios executed by ProcessScenarioRunner in order of registration
+    """
+
+    def __init__(self, results, seconds):
+        self.results = results
+        self.seconds = seconds
+
+    @property
+    def passed(self):
+        return all(result.passed for result in self.results)
+
+    @property
+    def failed(self):
+        return [result for result in self.results if not result.passed]
+
+    def durations(self):
+        """
+        Scenario durations which can be given to next run for balancing
+        """
+        return dict((result.name, result.seconds) for result in self.results if result.error is None)
+
+    def to_json(self, stream):
+        json.dump({"passed": self.passed, "seconds": self.seconds,
+                   "results": [result.as_dict() for result in self.results]}, stream, indent=1)
+
+
+def _flatten(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            for case in _flatten(test):
+                yield case
+        else:
+            yield test
+
+
+class _PipeReporter(StepHook):
+
+    def __init__(self, connection, name):
+        self._connection = connection
+        self._name = name
+
+    def on_step_stop(self, step, time):
+        self._connection.send(("step", self._name, step_record(step, time)))
+
+
+def _work(connection, timeout, virtual):
+    """
+    Worker process: run scenarios received from coordinator until None is received
+    """
+    worker = os.getpid()
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        result = RemoteScenarioResult(task.name, worker=worker)
+        start = default_timer()
+        sm = None
+        try:
+            sm, scenario_timeout = task.build(task.timeout or timeout)
+            connection.send(("start", task.name, scenario_timeout))
+            sm.add_hook(_PipeReporter(connection, task.name))
+            sm.run(timeout=scenario_timeout, virtual=virtual)
+        except Exception as err:
+            result.error = repr(err)
+        result.seconds = default_timer() - start
+        if sm is not None:
+            result.completed = sm.completed
+            result.warnings = sm.collect_warnings()
+            result.alerts = sm.collect_alerts()
+        connection.send(("result", task.name, result))
+
+
+class _Worker(object):
+
+    def __init__(self, context, timeout, virtual):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_work, args=(child, timeout, virtual))
+        self.process.daemon = True
+        self.process.start()
+        # Only worker keeps its end, so coordinator receives EOF if worker dies
+        child.close()
+        self.task = None
+        self.started = None
+        self.deadline = None
+
+    def send(self, task, deadline=None):
+        """
+        :param deadline: time (default_timer) after which worker is considered blocked
+        """
+        self.task = task
+        self.deadline = deadline
+        self.connection.send(task)
+
+
+class ProcessScenarioRunner(object):
+    """
+    Run scenarios in pool of local worker processes. Coordinator gives next scenario to worker
+    which finished previous one, scenarios are given longest first by known durations, so
+    workers finish at about the same time. Every worker has own pipe to coordinator, step
+    results are streamed through it while scenarios are running and crash of worker does not
+    affect others.
+
+    @ivar int workers: amount of worker processes
+    @ivar dict durations: scenario name to seconds of previous run
+    @ivar TimingHistory history: durations are taken from history and timings of scenarios are recorded to it
+    @ivar float grace: worker which runs scenario longer than its timeout plus grace seconds (in wall
+        clock time) is terminated, so action blocked forever does not block the whole run
+    """
+
+    def __init__(self, workers=None, timeout=180, durations=None, virtual=False, history=None, grace=10.0):
+        self._log = logging.getLogger("step_manager")
+        self.workers = workers or multiprocessing.cpu_count()
+        self.timeout = timeout
+        self.durations = dict(durations or ())
+        self.virtual = virtual
+        self.history = history
+        self.grace = grace
+        self._tasks = list()
+
+    def add(self, task):
+        """
+        :raise ValueError: task with the same name is already added, results and durations are kept by names
+        """
+        if any(added.name == task.name for added in self._tasks):
+            raise ValueError("Scenario {name} is already added, give tasks unique names".format(name=task.name))
+        self._tasks.append(task)
+        return task
+
+    def add_test_case(self, test_id, timeout=None):
+        """
+        Add StepTestCase by id, e.g. "tests.test_call.TestCall.runTest"
+        """
+        return self.add(ScenarioTask(ScenarioTask.TEST, test_id, timeout=timeout))
+
+    def add_file(self, path, name=None, timeout=None):
+        """
+        Add scenario file written by dump_scenario
+        """
+        return self.add(ScenarioTask(ScenarioTask.FILE, path, name=name, timeout=timeout))
+
+    def add_factory(self, path, name=None, timeout=None):
+        """
+        Add function returning StepManager by import path "module:function"
+        """
+        return self.add(ScenarioTask(ScenarioTask.FACTORY, path, name=name, timeout=timeout))
+
+    def add_directory(self, directory, pattern="test*.py", top_level_dir=None):
+        """
+        Add StepTestCases found by unittest discovery in directory
+        """
+        suite = unittest.defaultTestLoader.discover(directory, pattern=pattern, top_level_dir=top_level_dir)
+        return [self.add_test_case(case.id()) for case in _flatten(suite) if hasattr(case, "createScenario")]
+
+    def order(self):
+        """
+        Tasks in order they are given to workers: longest first by durations and history,
+        scenarios without known duration are estimated by average duration
+        """
+        durations = dict(self.durations)
+        if self.history is not None:
+            durations.update(self.history.durations([task.name for task in self._tasks]))
+        known = [durations[task.name] for task in self._tasks if task.name in durations]
+        default = sum(known) / len(known) if known else 0.0
+        return sorted(self._tasks, key=lambda task: durations.get(task.name, default), reverse=True)
+
+    def run(self, on_step=None, on_result=None):
+        """
+        :param on_step: callable receiving scenario name and step record as soon as step is finished
+        :param on_result: callable receiving RemoteScenarioResult as soon as scenario is finished
+        :rtype: CombinedResult
+        """
+        start = default_timer()
+        context = multiprocessing.get_context()
+        pending = deque(self.order())
+        workers = dict()
+        for _ in range(min(self.workers, len(pending))):
+            self._start_worker(context, workers, pending)
+
+        finished = dict()
+        steps = dict()
+        while workers:
+            deadline = min(worker.deadline for worker in workers.values())
+            ready = wait(list(workers), timeout=max(deadline - default_timer(), 0.0))
+            for connection in ready:
+                worker = workers[connection]
+                try:
+                    kind, name, payload = connection.recv()
+                except EOFError:
+                    del workers[connection]
+                    worker.process.join()
+                    self._crashed(worker, steps, finished, on_result,
+                                  "Worker exited with code {code}".format(code=worker.process.exitcode))
+                    if pending:
+                        self._start_worker(context, workers, pending)
+                    continue
+                if kind == "start":
+                    # Scenario is built, its own timeout is known
+                    worker.deadline = default_timer() + payload + self.grace
+                elif kind == "step":
+                    steps.setdefault(name, list()).append(payload)
+                    if on_step is not None:
+                        on_step(name, payload)
+                else:
+                    self._finish(payload, steps, finished, on_result)
+                    if pending:
+                        self._send(worker, pending.popleft())
+                    else:
+                        worker.send(None)
+                        worker.process.join()
+                        connection.close()
+                        del workers[connection]
+            now = default_timer()
+            for connection, worker in list(workers.items()):
+                if worker.deadline <= now:
+                    del workers[connection]
+                    worker.process.terminate()
+                    self._crashed(worker, steps, finished, on_result,
+                                  "Worker terminated after {seconds:.1f} seconds without result".format(
+                                      seconds=now - worker.started))
+                    if pending:
+                        self._start_worker(context, workers, pending)
+        self.durations.update((name, result.seconds) for name, result in finished.items() if result.error is None)
+        return CombinedResult([finished[task.name] for task in self._tasks], default_timer() - start)
+
+    def _start_worker(self, context, workers, pending):
+        worker = _Worker(context, self.timeout, self.virtual)
+        workers[worker.connection] = worker
+        self._send(worker, pending.popleft())
+
+    def _send(self, worker, task):
+        # Deadline is updated once worker reports timeout of built scenario
+        worker.started = default_timer()
+        worker.send(task, deadline=worker.started + (task.timeout or self.timeout) + self.grace)
+
+    def _finish(self, result, steps, finished, on_result):
+        result.steps = steps.pop(result.name, list())
+        finished[result.name] = result
+        self._log.info("Scenario %s finished in %.3f seconds", result.name, result.seconds)
+        if self.history is not None and result.error is None:
+            timings = [(record["path"], record["stop"] - record["start"]) for record in result.steps]
+            result.regressions = self.history.record(result.name, result.seconds, timings, passed=result.passed)
+            for regression in result.regressions:
+                self._log.warning("Timing regression %r", regression)
+        if on_result is not None:
+            on_result(result)
+
+    def _crashed(self, worker, steps, finished, on_result, error):
+        """
+        Record scenario of worker which exited or was terminated while running it as failed
+        """
+        worker.process.join()
+        worker.connection.close()
+        self._log.error("Worker %s failed on scenario %s: %s", worker.process.pid, worker.task.name, error)
+        result = RemoteScenarioResult(worker.task.name, worker=worker.process.pid)
+        result.error = error
+        self._finish(result, steps, finished, on_result)
@@ -0,0 +1,120 @@
+#
+
+from __future__ import absolute_import
+
+import json
+
+from ._Hooks import StepHook
+from ._ParallelGroup import ParallelGroup
+from ._Step import State
+
+FAILED_STATES = (State.WARN, State.FAIL, State.BROK)
+
+
+def format_step(step, level, number):
+    """
+    Text line of step used by StepManager.dump and TextReporter
+    """
+    return "{padding} {number}. {name} [{state}] " \
+           "(action={action!r} expecteds=[{expecteds}] duration={duration!r})\n".format(
+        padding=".." * level, number=number, name=step.name, state=step.state, action=step.action,
+        expecteds=", ".join(repr(expected) for expected in step._expected), duration=step.duration)
+
+
+def write_steps(steps, stream, level=0, prefix="", failed_only=False, _pending=None):
+    """
+    Write steps with their substeps and group children to stream line by line
+
+    :param prefix: order number of step owning steps followed by dot
+    :param failed_only: write only steps which are not passed and steps which contain them
+    """
+    if _pending is None:
+        _pending = list()
+    for position, step in enumerate(steps, 1):
+        number = "{prefix}{position}".format(prefix=prefix, position=position)
+        if not failed_only or step.state in FAILED_STATES:
+            # Parents of failed step are written only when failed step is found
+            for parent, parent_level, parent_number in _pending:
+                stream.write(format_step(parent, parent_level, parent_number))
+            del _pending[:]
+            stream.write(format_step(step, level, number))
+        elif isinstance(step, ParallelGroup) or step.sm is not None:
+            _pending.append((step, level, number))
+        else:
+            continue
+        if isinstance(step, ParallelGroup):
+            write_steps(step.children, stream, level + 1, number + ".", failed_only, _pending)
+        if step.sm is not None:
+            write_steps(step.sm._steps, stream, level + 1, number + ".", failed_only, _pending)
+        if _pending and _pending[-1][0] is step:
+            _pending.pop()
+
+
+def step_number(step):
+    """
+    Order number of step in the tree of step managers, e.g. "2.1.3"
+    """
+    numbers = list()
+    while step is not None:
+        owner = step._owner
+        if isinstance(owner, ParallelGroup):
+            numbers.append(owner._children.index(step) + 1)
+            step = owner
+        else:
+            numbers.append(owner._steps.index(step) + 1)
+            step = owner.get_parent_step()
+    return ".".join(str(number) for number in reversed(numbers))
+
+
+def step_record(step, time):
+    """
+    Result of finished step as dict which can be written as JSON
+    """
+    return {
+        "number": step_number(step),
+        "path": list(step.path),
+        "state": step.state,
+        "start": step.start_time,
+        "stop": time,
+        "attempts": step.attempts_used,
+        "warnings": step.collect_warnings(),
+        "alerts": step.collect_alerts(),
+    }
+
+
+class StreamReporter(StepHook):
+    """
+    Hook which writes result of every step to stream as soon as step is finished, so report
+    is never kept in memory and is available even if scenario is interrupted
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def on_step_stop(self, step, time):
+        self._stream.write(self.format(step, time))
+        flush = getattr(self._stream, "flush", None)
+        if flush is not None:
+            flush()
+
+    def format(self, step, time):
+        raise NotImplementedError()
+
+
+class TextReporter(StreamReporter):
+    """
+    Write finished steps in format of StepManager.dump
+    """
+
+    def format(self, step, time):
+        number = step_number(step)
+        return format_step(step, number.count("."), number)
+
+
+class JsonLinesReporter(StreamReporter):
+    """
+    Write finished steps as JSON objects, one per line
+    """
+
+    def format(self, step, time):
+        return json.dumps(step_record(step, time)) + "\n"
@@ -0,0 +1,104 @@
+#
+
+from __future__ import absolute_import
+
+import random
+
+
+class RetryPolicy(object):
+    """
+    Decide delay between attempts of step expecteds and when attempts are exhausted
+
+    @ivar int attempts: maximum amount of attempts, None for unlimited
+    @ivar float deadline: maximum time since step start, next attempt is not scheduled after it
+    """
+
+    def __init__(self, attempts=None, deadline=None):
+        if attempts is None and deadline is None:
+            raise ValueError("Retry policy requires attempts or deadline")
+        self.attempts = attempts
+        self.deadline = deadline
+
+    def _check_interval(self, name, value):
+        """
+        Delay should be positive unless attempts are limited, otherwise step limited by deadline
+        only is polled without pause and with virtual clock its deadline is never reached
+        """
+        if value < 0 or (value == 0 and self.attempts is None):
+            raise ValueError("Retry {name} should be positive when attempts are not limited, got {value!r}".format(
+                name=name, value=value))
+
+    def interval(self, attempt):
+        """
+        Nominal delay after given attempt (attempts are counted from 1)
+        """
+        raise NotImplementedError()
+
+    def delay(self, attempt):
+        """
+        Delay which should be used before next attempt
+        """
+        return self.interval(attempt)
+
+    def is_last(self, attempt, elapsed):
+        """
+        :param attempt: amount of attempts already made
+        :param elapsed: seconds since step start
+        """
+        if self.attempts is not None and attempt >= self.attempts:
+            return True
+        if self.deadline is not None and elapsed + self.interval(attempt) > self.deadline:
+            return True
+        return False
+
+
+class FixedRetry(RetryPolicy):
+
+    def __init__(self, interval, attempts=None, deadline=None):
+        super(FixedRetry, self).__init__(attempts=attempts, deadline=deadline)
+        self._check_interval("interval", interval)
+        self._interval = interval
+
+    def interval(self, attempt):
+        return self._interval
+
+
+class ExponentialRetry(RetryPolicy):
+    """
+    Delay grows as initial * factor ** (attempt - 1) up to max_interval. With jitter delay is
+    randomly reduced by up to given fraction, so many polling steps do not hit system at once
+    """
+
+    def __init__(self, initial, factor=2.0, max_interval=None, jitter=0.0, attempts=None, deadline=None, rnd=None):
+        super(ExponentialRetry, self).__init__(attempts=attempts, deadline=deadline)
+        self._check_interval("initial", initial)
+        if factor < 1 and attempts is None:
+            # Sum of decreasing delays converges, so deadline may be never reached
+            raise ValueError("Retry factor should be at least 1 when attempts are not limited, got {factor!r}".format(
+                factor=factor))
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self._random = rnd or random.Random()
+
+    def interval(self, attempt):
+        result = self.initial * self.factor ** (attempt - 1)
+        if self.max_interval is not None:
+            result = min(result, self.max_interval)
+        return result
+
+    def delay(self, attempt):
+        result = self.interval(attempt)
+        if self.jitter:
+            result -= result * self.jitter * self._random.random()
+        return result
+
+
+class DeadlineRetry(FixedRetry):
+    """
+    Retry with fixed interval until deadline (seconds since step start) is reached
+    """
+
+    def __init__(self, deadline, interval, attempts=None):
+        super(DeadlineRetry, self).__init__(interval=interval, attempts=attempts, deadline=deadline)
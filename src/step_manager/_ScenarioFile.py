@@ -0,0 +1,241 @@
+#
+
+from __future__ import absolute_import
+
+import json
+from importlib import import_module
+
+from ._Deadline import Deadline
+from ._Expected import Expected
+from ._ParallelGroup import ParallelGroup
+from ._Retry import DeadlineRetry, ExponentialRetry, FixedRetry
+
+FORMAT_VERSION = 1
+
+
+class LazyCallable(object):
+    """
+    Reference to function by import path "module:qualname", module is imported on first call
+
+    Loaded scenarios use it for actions and expecteds, so building of step manager does not
+    import test modules. References with the same path are equal, so expected cache is shared.
+    """
+
+    __slots__ = ("path", "_target")
+
+    def __init__(self, path):
+        self.path = path
+        self._target = None
+
+    @property
+    def __name__(self):
+        return self.path
+
+    def resolve(self):
+        if self._target is None:
+            module_name, sep, qualname = self.path.partition(":")
+            if not sep:
+                module_name, _, qualname = self.path.rpartition(".")
+            target = import_module(module_name)
+            for name in qualname.split("."):
+                target = getattr(target, name)
+            self._target = target
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __eq__(self, other):
+        return isinstance(other, LazyCallable) and other.path == self.path
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __reduce__(self):
+        return LazyCallable, (self.path,)
+
+    def __repr__(self):
+        return "LazyCallable({path!r})".format(path=self.path)
+
+
+def callable_path(func):
+    """
+    :return: import path "module:qualname" of function
+    :raise ValueError: if function can't be imported by path (lambda, closure, bound method)
+    """
+    if isinstance(func, LazyCallable):
+        return func.path
+    module_name = getattr(func, "__module__", None)
+    qualname = getattr(func, "__qualname__", None)
+    if module_name is None or qualname is None or "<" in qualname or getattr(func, "__self__", None) is not None:
+        raise ValueError("{func!r} can't be referenced by import path".format(func=func))
+    return "{module}:{qualname}".format(module=module_name, qualname=qualname)
+
+
+_RETRY_FIELDS = [
+    ("deadline", DeadlineRetry, ("deadline", "_interval", "attempts")),
+    ("fixed", FixedRetry, ("_interval", "attempts", "deadline")),
+    ("exponential", ExponentialRetry, ("initial", "factor", "max_interval", "jitter", "attempts", "deadline")),
+]
+
+
+def _dump_retry(retry):
+    if retry is None:
+        return None
+    for name, cls, fields in _RETRY_FIELDS:
+        if type(retry) is cls:
+            result = {"type": name}
+            for field in fields:
+                result[field.lstrip("_")] = getattr(retry, field)
+            return result
+    raise ValueError("Retry policy {retry!r} can't be serialized".format(retry=retry))
+
+
+def _load_retry(data):
+    if data is None:
+        return None
+    data = dict(data)
+    name = data.pop("type")
+    for retry_name, cls, _ in _RETRY_FIELDS:
+        if retry_name == name:
+            return cls(**data)
+    raise ValueError("Unknown retry policy {name}".format(name=name))
+
+
+def _dump_deadline(deadline):
+    if deadline is None:
+        return None
+    return {"seconds": deadline.seconds, "substeps": deadline.substeps, "skip": deadline.skip}
+
+
+def _load_deadline(data):
+    if data is None:
+        return None
+    return Deadline(**data)
+
+
+def _dump_executor(executor):
+    if executor is not None and not isinstance(executor, str):
+        raise ValueError("Only named executors can be serialized, got {executor!r}".format(executor=executor))
+    return executor
+
+
+def _dump_kwargs(kwargs, step):
+    try:
+        json.dumps(kwargs)
+    except (TypeError, ValueError) as err:
+        raise ValueError("Kwargs of step {name} can't be serialized: {err}".format(name=step.name, err=err))
+    return kwargs
+
+
+def _put(data, key, value, default):
+    if value != default:
+        data[key] = value
+
+
+def _dump_expected(expected, step):
+    if type(expected) is not Expected:
+        raise ValueError("Expected {expected!r} can't be serialized".format(expected=expected))
+    data = {"method": callable_path(expected._method)}
+    _put(data, "should_return", expected._should_return, True)
+    _put(data, "is_alert", expected.is_alert, False)
+    _put(data, "executor", _dump_executor(expected._executor), None)
+    _put(data, "retry", _dump_retry(expected.retry), None)
+    _put(data, "cache_ttl", expected._cache_ttl, None)
+    _put(data, "kwargs", _dump_kwargs(expected._kwargs, step), {})
+    return data
+
+
+def _dump_step(step):
+    data = {"name": step.name}
+    if isinstance(step, ParallelGroup):
+        data["group"] = {"fail_fast": step.fail_fast, "children": [_dump_step(child) for child in step._children]}
+    elif step.action is not None:
+        data["action"] = callable_path(step.action)
+    _put(data, "duration", step.duration, 0.0)
+    _put(data, "interval", step._base_interval, 0)
+    _put(data, "attempts", step._attempts, 1)
+    _put(data, "throw_except", step.throw_except, False)
+    _put(data, "executor", _dump_executor(step._executor), None)
+    _put(data, "retry", _dump_retry(step._retry), None)
+    _put(data, "deadline", _dump_deadline(step.deadline), None)
+    _put(data, "depends_on", None if step.depends_on is None else list(step.depends_on), None)
+    _put(data, "kwargs", _dump_kwargs(step._kwargs, step), {})
+    _put(data, "expecteds", [_dump_expected(expected, step) for expected in step._expected], [])
+    if step.sm is not None:
+        _put(data, "substeps", [_dump_step(substep) for substep in step.sm._steps], [])
+    return data
+
+
+def dump_scenario(sm, stream, indent=None):
+    """
+    Write step tree of step manager as JSON. Actions and expected methods are stored by import
+    path, so they should be module level functions, kwargs should be JSON serializable
+
+    :param StepManager sm: step manager to be written
+    :param stream: text stream
+    :param indent: indent of JSON, use 1 for files which are diffed
+    :raise ValueError: if step can't be serialized
+    """
+    data = {"version": FORMAT_VERSION, "steps": [_dump_step(step) for step in sm._steps]}
+    json.dump(data, stream, indent=indent, separators=(",", ":") if indent is None else None)
+
+
+def _load_expecteds(step, expecteds, functions):
+    for data in expecteds:
+        step.add_expected(functions(data["method"]), should_return=data.get("should_return", True),
+                          is_alert=data.get("is_alert", False), executor=data.get("executor"),
+                          retry=_load_retry(data.get("retry")), cache_ttl=data.get("cache_ttl"),
+                          **data.get("kwargs", {}))
+
+
+def _load_steps(owner, steps, functions):
+    for data in steps:
+        name = data["name"]
+        group = data.get("group")
+        if group is not None:
+            step = owner.add_parallel_group(name, duration=data.get("duration", 0.0), fail_fast=group["fail_fast"],
+                                            deadline=_load_deadline(data.get("deadline")),
+                                            depends_on=data.get("depends_on"))
+            _load_steps(step, group["children"], functions)
+        else:
+            action = data.get("action")
+            step = owner.add_step(name=name, action=None if action is None else functions(action),
+                                  duration=data.get("duration", 0.0), interval=data.get("interval", 0),
+                                  attempts=data.get("attempts", 1), throw_except=data.get("throw_except", False),
+                                  executor=data.get("executor"), retry=_load_retry(data.get("retry")),
+                                  deadline=_load_deadline(data.get("deadline")), depends_on=data.get("depends_on"),
+                                  **data.get("kwargs", {}))
+        _load_expecteds(step, data.get("expecteds", ()), functions)
+        substeps = data.get("substeps")
+        if substeps:
+            _load_steps(step.get_substeps_manager(), substeps, functions)
+
+
+def load_scenario(stream, sm=None):
+    """
+    Build step tree written by dump_scenario. Functions are resolved on first call
+
+    :param stream: text stream
+    :param StepManager sm: step manager to add steps to, new one is created by default
+    :rtype: StepManager
+    """
+    data = json.load(stream)
+    if data.get("version") != FORMAT_VERSION:
+        raise ValueError("Unsupported scenario format version {version}".format(version=data.get("version")))
+    if sm is None:
+        from ._StepManager import StepManager
+        sm = StepManager()
+    references = dict()
+
+    def functions(path):
+        reference = references.get(path)
+        if reference is None:
+            reference = references[path] = LazyCallable(path)
+        return reference
+
+    _load_steps(sm, data["steps"], functions)
+    return sm
@@ -0,0 +1,219 @@
+#
+
+from __future__ import absolute_import
+
+import logging
+from collections import deque
+from functools import partial
+
+from reactor import Reactor
+
+from ._AsyncioReactor import AsyncioReactor
+from ._VirtualReactor import VirtualReactor
+
+
+class ScenarioResult(object):
+    """
+    Outcome of one scenario executed by ScenarioRunner
+
+    @ivar StepManager sm: step manager of scenario
+    @ivar bool timed_out: scenario was cancelled because of its timeout
+    @ivar Exception error: exception raised by scenario step
+    @ivar list regressions: TimingRegression of scenario and its steps if runner has history
+    """
+
+    def __init__(self, name, sm, timeout, case=None):
+        self.name = name
+        self.sm = sm
+        self.timeout = timeout
+        self.case = case
+        self.start_time = None
+        self.stop_time = None
+        self.finished = False
+        self.timed_out = False
+        self.error = None
+        self.regressions = list()
+
+    @property
+    def completed(self):
+        return self.sm.completed
+
+    @property
+    def seconds(self):
+        if self.start_time is None or self.stop_time is None:
+            return 0
+        return self.stop_time - self.start_time
+
+    @property
+    def passed(self):
+        return self.completed and self.error is None and not self.sm.has_warnings()
+
+    def __repr__(self):
+        return "ScenarioResult(name={name!r}, passed={passed!r}, seconds={seconds:.3f})".format(
+            name=self.name, passed=self.passed, seconds=self.seconds)
+
+
+class _ScenarioReactor(object):
+    """
+    Reactor given to single scenario. Callbacks are executed on shared reactor while scenario
+    is running, stop finishes only this scenario and exceptions are recorded instead of breaking
+    other scenarios
+    """
+
+    def __init__(self, runner, shared, result):
+        self._runner = runner
+        self._shared = shared
+        self._result = result
+        self._start = shared.seconds()
+        if hasattr(shared, "call_when_done"):
+            self.call_when_done = self._call_when_done
+
+    def seconds(self):
+        return self._shared.seconds() - self._start
+
+    def call_later(self, delay, callback):
+        self._shared.call_later(delay, lambda shared: self._call(callback))
+
+    def _call_when_done(self, future, callback):
+        self._shared.call_when_done(future, lambda shared: self._call(callback))
+
+    def stop(self):
+        self._runner._finish(self._shared, self._result)
+
+    def _call(self, callback):
+        if self._result.finished:
+            return
+        try:
+            callback(self)
+        except Exception as err:
+            self._result.error = err
+            self._result.sm.cancel()
+            self._runner._finish(self._shared, self._result)
+
+
+class ScenarioRunner(object):
+    """
+    Run many step managers on one shared reactor, so total time is close to the longest
+    scenario instead of the sum of all scenarios
+
+    @ivar int concurrency: maximum amount of scenarios running at the same time
+    @ivar float timeout: default timeout of single scenario
+    @ivar TimingHistory history: scenarios are started longest first by history and their timings are recorded
+    """
+
+    def __init__(self, concurrency=100, timeout=180, history=None):
+        self._log = logging.getLogger("step_manager")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.history = history
+        self._results = list()
+        self._waiting = deque()
+        self._running = 0
+
+    def add(self, sm, name=None, timeout=None):
+        """
+        Register step manager to be run
+
+        :rtype: ScenarioResult
+        """
+        if name is None:
+            name = "scenario_{number}".format(number=len(self._results) + 1)
+        result = ScenarioResult(name=name, sm=sm, timeout=self.timeout if timeout is None else timeout)
+        self._results.append(result)
+        return result
+
+    def add_test_case(self, case):
+        """
+        Register StepTestCase, its scenario is created with createScenario and its TIMEOUT is used
+        """
+        result = self.add(case.createScenario(), name=case.id(), timeout=getattr(case, "TIMEOUT", None))
+        result.case = case
+        return result
+
+    def run(self, timeout=None, virtual=False):
+        """
+        Run all registered scenarios on one reactor
+
+        :param timeout: timeout of whole run, by default it is calculated from scenario timeouts
+        :param virtual: use simulated clock for all scenarios
+        :return: list of ScenarioResult in order of registration
+        """
+        react = VirtualReactor() if virtual else Reactor()
+        react.call_later(0.0, self.start)
+        try:
+            react.run(self._total_timeout() if timeout is None else timeout)
+        finally:
+            self._close()
+        return list(self._results)
+
+    async def run_async(self, timeout=None):
+        """
+        Run all registered scenarios on running asyncio loop
+        """
+        react = AsyncioReactor()
+        react.call_later(0.0, self.start)
+        try:
+            await react.wait(self._total_timeout() if timeout is None else timeout)
+        finally:
+            self._close()
+        return list(self._results)
+
+    def start(self, reactor):
+        waiting = [result for result in self._results if not result.finished]
+        if self.history is not None:
+            # Scenarios without history are estimated by average duration
+            durations = self.history.durations([result.name for result in waiting])
+            default = sum(durations.values()) / len(durations) if durations else 0.0
+            waiting.sort(key=lambda result: durations.get(result.name, default), reverse=True)
+        self._waiting = deque(waiting)
+        self._running = 0
+        if len(self._waiting) == 0:
+            reactor.stop()
+        self._start_next(reactor)
+
+    def _total_timeout(self):
+        if len(self._results) == 0:
+            return 0
+        waves = (len(self._results) + self.concurrency - 1) // self.concurrency
+        return waves * max(result.timeout for result in self._results)
+
+    def _start_next(self, reactor):
+        while self._running < self.concurrency and len(self._waiting) > 0:
+            result = self._waiting.popleft()
+            self._running += 1
+            scenario_reactor = _ScenarioReactor(self, reactor, result)
+            result.start_time = reactor.seconds()
+            self._log.info("Scenario %s started", result.name)
+            reactor.call_later(result.timeout, partial(self._timeout, result=result))
+            scenario_reactor.call_later(0.0, result.sm.start)
+
+    def _timeout(self, reactor, result):
+        if result.finished:
+            return
+        result.timed_out = True
+        result.sm.cancel()
+        result.sm.register_warning(result.sm._timeout_message())
+        self._finish(reactor, result)
+
+    def _finish(self, reactor, result):
+        if result.finished:
+            return
+        result.finished = True
+        result.stop_time = reactor.seconds()
+        self._running -= 1
+        if result.error is not None:
+            self._log.error("Scenario %s failed: %r", result.name, result.error)
+        else:
+            self._log.info("Scenario %s finished in %.3f seconds", result.name, result.seconds)
+        if self.history is not None and not result.timed_out:
+            result.regressions = self.history.record_sm(result.name, result.sm, result.seconds, passed=result.passed)
+            for regression in result.regressions:
+                self._log.warning("Timing regression %r", regression)
+        if self._running == 0 and len(self._waiting) == 0:
+            reactor.stop()
+        else:
+            self._start_next(reactor)
+
+    def _close(self):
+        for result in self._results:
+            result.sm.shutdown_executors()
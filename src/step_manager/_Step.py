@@ -3,11 +3,20 @@
 from __future__ import absolute_import
 
 import logging
+from copy import copy
 from datetime import datetime
-from ._Expected import Expected
+from inspect import isawaitable
+from timeit import default_timer
+
+from ._AsyncioReactor import schedule_awaitable
+from ._Deadline import Deadline
+from ._Expected import EventExpected, Expected
+from ._Notice import Notice
 
 
 class State(object):
+    __slots__ = ()
+
     UNKNOWN = "unknown"
     PASS = "passed"
     FAIL = "failed"
@@ -18,28 +27,81 @@ class State(object):
 class Step(object):
     """
     @ivar StepManager _owner:
+
+    Steps use __slots__ and share empty tuple for expecteds and notices until first one is added,
+    so big scenarios stay small in memory
     """
 
-    def __init__(self, owner, name, action, duration=0.0, interval=0, attempts=1, throw_except=False, **kwargs):
+    __slots__ = ("_owner", "_name", "_action", "_kwargs", "interval", "_base_interval", "_retry", "_attempts",
+                 "_left_attempts", "repeat", "_action_executed", "_sm", "_duration", "_expected", "_warnings",
+                 "_alerts", "start_time", "start_info_provided", "throw_except", "_state", "stop_time", "_cancelled",
+                 "_executor", "_action_future", "_pending", "_check_index", "_attempts_used", "_opened",
+                 "_wake_token", "_work_started", "_expected_shared", "_deadline", "_depends_on")
+
+    def __init__(self, owner, name, action, duration=0.0, interval=0, attempts=1, throw_except=False, executor=None,
+                 retry=None, deadline=None, depends_on=None, **kwargs):
         self._owner = owner
-        self.log = owner.log
         self._name = name
         self._action = action
         self._kwargs = kwargs
         self.interval = interval
-        self._left_attempts = attempts
-        self.repeat = False
-        self._action_executed = False
+        self._base_interval = interval
+        self._retry = retry
+        self._attempts = attempts
+        self._deadline = Deadline.create(deadline)
+        self._depends_on = None if depends_on is None else tuple(depends_on)
         self._sm = None
         self._duration = duration
-        self._expected = list()
-        self.warnings = list()
-        self.alerts = list()
+        self._expected = ()
+        self._expected_shared = False
+        self.throw_except = throw_except
+        self._executor = executor
+        self._reset()
+
+    def _reset(self):
+        """
+        Set run state of step to initial one
+        """
+        self.interval = self._base_interval
+        self._left_attempts = self._attempts
+        self.repeat = False
+        self._action_executed = False
+        self._warnings = ()
+        self._alerts = ()
         self.start_time = None
         self.start_info_provided = False
-        self.throw_except = throw_except
         self._state = State.UNKNOWN
         self.stop_time = None
+        self._cancelled = False
+        self._action_future = None
+        self._pending = None
+        self._check_index = 0
+        self._attempts_used = 0
+        self._opened = False
+        self._wake_token = 0
+        self._work_started = None
+
+    def clone(self, owner):
+        """
+        Copy step definition without run state. Action kwargs and expecteds are shared with
+        this step until one of them adds expected or is started, substeps are cloned
+
+        :param owner: step manager of the copy
+        :rtype: Step
+        """
+        step = copy(self)
+        step._owner = owner
+        step._reset()
+        if self._expected:
+            self._expected_shared = step._expected_shared = True
+        if self._sm is not None:
+            step._sm = self._sm.clone()
+            step._sm.set_parent_step(step)
+        return step
+
+    def _own_expecteds(self):
+        self._expected = [expected if expected.owner is self else expected.clone(self) for expected in self._expected]
+        self._expected_shared = False
 
     @property
     def name(self):
@@ -49,6 +111,55 @@ class Step(object):
     def state(self):
         return self._state
 
+    @property
+    def warnings(self):
+        """
+        Messages of warnings of step and its substeps. It is read only snapshot (tuple), warnings
+        are added with register_warning, records are available with get_warning_records
+        """
+        return tuple(self.collect_warnings())
+
+    @property
+    def alerts(self):
+        """
+        Messages of alerts of step and its substeps. It is read only snapshot (tuple), alerts
+        are added with register_alert, records are available with get_alert_records
+        """
+        return tuple(self.collect_alerts())
+
+    @property
+    def path(self):
+        """
+        Names of parent steps from main step manager down to this step
+        """
+        return self._owner.get_path() + (self._name,)
+
+    @property
+    def attempts_used(self):
+        return self._attempts_used
+
+    @property
+    def pending(self):
+        """
+        Future which should be completed before step is run again
+        """
+        return self._pending
+
+    @property
+    def deadline(self):
+        return self._deadline
+
+    @property
+    def depends_on(self):
+        """
+        Names of steps which should be finished before this step is started, None for previous step
+        """
+        return self._depends_on
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
     @property
     def seconds(self):
         result = 0
@@ -68,6 +179,21 @@ class Step(object):
     def sm(self):
         return self._sm
 
+    @property
+    def log(self):
+        return self._owner.log
+
+    def set_owner(self, owner):
+        self._owner = owner
+        if self._sm is not None:
+            self._sm.set_parent_step(self)
+
+    def get_context(self):
+        """
+        Context of step manager owning the step
+        """
+        return self._owner.get_context()
+
     def set_start_time(self, start_time):
         self.start_time = start_time
 
@@ -83,80 +209,212 @@ class Step(object):
     def set_duration(self, duration):
         self._duration = duration
 
-    def add_substep(self, name, action=None, duration=0.0, interval=0, attempts=1, throw_except=False, **kwargs):
+    def get_executor(self, executor):
+        return self._owner.get_executor(executor)
+
+    def get_expected_cache(self):
+        return self._owner.get_expected_cache()
+
+    def get_substeps_manager(self):
+        """
+        Step manager of substeps, it is created on first call
+        """
         if self._sm is None:
             self._sm = self._owner.createStepManager()
-        step = self._sm.add_step(name=name, action=action, duration=duration, interval=interval,
-                                 attempts=attempts, throw_except=throw_except, **kwargs)
-        return step
+            self._sm.set_parent_step(self)
+        return self._sm
+
+    def add_substep(self, name, action=None, duration=0.0, interval=0, attempts=1, throw_except=False, executor=None,
+                    retry=None, deadline=None, depends_on=None, **kwargs):
+        return self.get_substeps_manager().add_step(name=name, action=action, duration=duration, interval=interval,
+                                                    attempts=attempts, throw_except=throw_except, executor=executor,
+                                                    retry=retry, deadline=deadline, depends_on=depends_on, **kwargs)
 
     def add_expected(self, method, **kwargs):
         """
         Add expected to step
         :param method: Method which will be called
-        :param kwargs: different kwargs which will be passed to expected as is_alert
+        :param kwargs: different kwargs which will be passed to expected as is_alert, executor, retry or cache_ttl
+            (results of expecteds with the same method and kwargs are shared for cache_ttl seconds)
         :return:
         """
-        start = datetime.now()
-        self.log(logging.DEBUG, "Add expected to step {name} at {start}".format(name=self.name, start=start))
-        self._expected.append(Expected(owner=self, method=method, **kwargs))
-        stop = datetime.now()
-        took = stop - start
-        self.log(logging.DEBUG, "Expected added took {took}".format(took=took))
+        debug = self._owner.log_enabled(logging.DEBUG)
+        if debug:
+            start = datetime.now()
+            self.log(logging.DEBUG, "Add expected to step {name} at {start}", name=self.name, start=start)
+        self._add_expected(Expected(owner=self, method=method, **kwargs))
+        if debug:
+            self.log(logging.DEBUG, "Expected added took {took}", took=datetime.now() - start)
         return self
 
+    def cancel(self):
+        """
+        Cancel pending execution of step and its substeps
+        """
+        self._cancelled = True
+        if self._opened:
+            for expected in self._expected:
+                expected.close()
+        if self._sm is not None:
+            self._sm.cancel()
+
+    def add_expected_event(self, source, predicate=None, **kwargs):
+        """
+        Add expected which passes when source publishes event matching predicate
+
+        :param EventSource source: source of events
+        :param predicate: callable receiving event args, any event matches if not provided
+        :param kwargs: is_alert, retry or message used when event was not received
+        :return:
+        """
+        self._add_expected(EventExpected(owner=self, source=source, predicate=predicate, **kwargs))
+        return self
+
+    def _add_expected(self, expected):
+        if self._expected_shared:
+            self._own_expecteds()
+        elif not self._expected:
+            self._expected = list()
+        self._expected.append(expected)
+
+    def park(self, waker):
+        """
+        Prepare step for waiting next attempt. Waker is called by event expecteds when they can pass
+
+        :return: token which identifies this wait
+        """
+        self._wake_token += 1
+        for expected in self._expected:
+            if not expected.settled:
+                expected.set_waker(waker)
+        return self._wake_token
+
+    def wake(self, token):
+        """
+        :return: True if wait identified by token was not finished yet
+        """
+        if token != self._wake_token:
+            return False
+        self._wake_token += 1
+        return True
+
     def register_warning(self, msg):
-        self.warnings.append("{step}: {msg}".format(step=self.name, msg=msg))
+        self._add_notice(Notice(path=(self.name,), message=msg, level=Notice.WARNING))
 
     def register_alert(self, msg):
-        self.alerts.append("{step}: {msg}".format(step=self.name, msg=msg))
+        self._add_notice(Notice(path=(self.name,), message=msg, level=Notice.ALERT))
+
+    def _add_notice(self, notice):
+        """
+        Store notice of this step or its substeps and pass it to step manager owning the step
+        """
+        if notice.level == Notice.ALERT:
+            if not self._alerts:
+                self._alerts = list()
+            self._alerts.append(notice)
+        else:
+            if not self._warnings:
+                self._warnings = list()
+            self._warnings.append(notice)
+        self._owner._notice_registered(notice)
+
+    def get_warning_records(self):
+        return list(self._warnings)
+
+    def get_alert_records(self):
+        return list(self._alerts)
 
     def collect_warnings(self):
-        if len(self.warnings) > 0:
-            return self.warnings
-        if self.sm is not None:
-            sm_warnings = self.sm.collect_warnings()
-            for msg in sm_warnings:
-                self.register_warning(msg=msg)
-        return self.warnings
+        return [str(notice) for notice in self._warnings]
 
     def collect_alerts(self):
-        if len(self.alerts) > 0:
-            return self.alerts
-        if self.sm is not None:
-            sm_alerts = self.sm.collect_alerts()
-            for msg in sm_alerts:
-                self.register_alert(msg=msg)
-        return self.alerts
-
-    def run(self):
-        # Step 1. Execute action in critical section
-        try:
-            if self._action and not self._action_executed:
-                if hasattr(self._action, '__name__'):
-                    action_name = self._action.__name__
-                else:
-                    action_name = self._action
-                self.log(logging.INFO, ".Action {action} with params {params} started"
-                                .format(action=action_name, params=self._kwargs))
-                self._action_executed = True
-                self._action(**self._kwargs)
-                self.log(logging.INFO, ".Action completed")
-            self._state = State.PASS
-        except Exception as err:
-            self._state = State.FAIL
-            self.log(logging.ERROR, "!Action failed with exception: {err!r}".format(err=err))
-            raise
-
-        # Step 2. Collect expected messages
-        self.repeat = False
-        self._left_attempts -= 1
-        for expected in self._expected:
+        return [str(notice) for notice in self._alerts]
+
+    def run(self, now=None):
+        """
+        Run action (once) and one attempt of expecteds which are not passed yet. If action or expected is
+        submitted to executor or is coroutine then run returns with `pending` future and should be called
+        again after it is done
+
+        :param now: reactor time, used by deadline based retry policies
+        """
+        self._pending = None
+        instrumented = self._owner.instrumented
+        if not self._opened:
+            self._opened = True
+            if self._expected_shared:
+                self._own_expecteds()
+            for expected in self._expected:
+                expected.open()
+        if self._check_index == 0:
+            # Step 1. Execute action in critical section
+            try:
+                if self._action and not self._action_executed:
+                    self.log(logging.INFO, ".Action {action} with params {params} started",
+                             action=getattr(self._action, '__name__', self._action), params=self._kwargs)
+                    self._action_executed = True
+                    if instrumented:
+                        self._work_started = default_timer()
+                    if self._executor is None:
+                        result = self._action(**self._kwargs)
+                        if isawaitable(result):
+                            self._action_future = schedule_awaitable(result)
+                        else:
+                            self.log(logging.INFO, ".Action completed")
+                            self._report_work("on_action")
+                    else:
+                        self._action_future = self.get_executor(self._executor).submit(self._action, **self._kwargs)
+                if self._action_future is not None:
+                    if not self._action_future.done():
+                        self._pending = self._action_future
+                        return
+                    future, self._action_future = self._action_future, None
+                    future.result()
+                    self.log(logging.INFO, ".Action completed")
+                    self._report_work("on_action")
+                if self._state != State.WARN:
+                    self._state = State.PASS
+            except Exception as err:
+                self._work_started = None
+                self._state = State.FAIL
+                self.log(logging.ERROR, "!Action failed with exception: {err!r}", err=err)
+                raise
+
+            # Step 2. Collect expected messages
+            self.repeat = False
+            self._left_attempts -= 1
+            self._attempts_used += 1
+        elapsed = 0
+        if now is not None and self.start_time is not None:
+            elapsed = now - self.start_time
+        while self._check_index < len(self._expected):
+            expected = self._expected[self._check_index]
+            if expected.settled:
+                self._check_index += 1
+                continue
+            if expected.due is not None and now is not None and expected.due > elapsed:
+                # Retry policy of this expected asks to wait longer than other expecteds
+                self.repeat = True
+                self._check_index += 1
+                continue
             try:
-                res, message = expected.run()
-                if not res and self._left_attempts == 0:
-                    self.log(logging.WARNING, "!Check of expected in step {step_name} failed with message: {message}"
-                             .format(step_name=self._name, message=message))
+                if instrumented and self._work_started is None:
+                    self._work_started = default_timer()
+                outcome = expected.run(now=now)
+                if outcome is None:
+                    self._pending = expected.pending
+                    return
+                res, message = outcome
+                self._report_work("on_expected", expected, res)
+                expected.attempts += 1
+                if res:
+                    expected.settled = True
+                    expected.close()
+                elif self._is_last(expected, elapsed):
+                    expected.settled = True
+                    expected.close()
+                    self.log(logging.WARNING, "!Check of expected in step {step_name} failed with message: {msg}",
+                             step_name=self._name, msg=message)
                     if expected.is_alert:
                         self.register_alert(message)
                     else:
@@ -165,11 +423,47 @@ class Step(object):
                     if self.throw_except:
                         raise AssertionError("!Check of expected in step {step_name} failed with message: {message}"
                                              .format(step_name=self._name, message=message))
-                elif not res:
+                else:
                     self.repeat = True
+                    policy = expected.retry or self._retry
+                    if policy is not None:
+                        expected.due = elapsed + policy.delay(expected.attempts)
             except Exception as err:
-                self.log(logging.ERROR, "!Check failed with exception: {err}".format(err=err))
+                self._check_index = 0
+                self._work_started = None
+                self.log(logging.ERROR, "!Check failed with exception: {err}", err=err)
                 self.register_warning(repr(err))
                 self._state = State.BROK
                 raise
+            self._check_index += 1
+        self._check_index = 0
+        if self.repeat:
+            self._update_interval(elapsed)
+
+    def _is_last(self, expected, elapsed):
+        policy = expected.retry or self._retry
+        if policy is None:
+            return self._left_attempts == 0
+        return policy.is_last(expected.attempts, elapsed)
+
+    def _update_interval(self, elapsed):
+        """
+        Sleep until the earliest expected which is not settled yet is due
+        """
+        if self._retry is None and all(expected.retry is None for expected in self._expected):
+            return
+        delays = list()
+        for expected in self._expected:
+            if expected.settled:
+                continue
+            if expected.due is None:
+                delays.append(self._base_interval)
+            else:
+                delays.append(max(expected.due - elapsed, 0))
+        self.interval = min(delays)
 
+    def _report_work(self, event, *args):
+        if self._work_started is not None:
+            seconds = default_timer() - self._work_started
+            self._work_started = None
+            self._owner._emit(event, self, *(args + (seconds,)))
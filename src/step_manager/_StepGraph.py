@@ -0,0 +1,107 @@
+#
+
+from __future__ import absolute_import
+
+from collections import deque
+
+
+class StepGraph(object):
+    """
+    Dependencies between queued steps of step manager. Step is ready as soon as all steps it
+    depends on are finished (including duration and substeps), ready steps are executed
+    concurrently
+
+    Step without depends_on depends on previous step of sequence, so steps without declared
+    dependencies keep sequential execution. Dependencies which are not queued (finished in
+    previous run) are satisfied.
+
+    @ivar dict _waiting: step to amount of unfinished dependencies
+    @ivar dict _finished: step to reactor time when step was finished
+    """
+
+    def __init__(self, sequence):
+        self._sequence = sequence
+        self._pending = set()
+        self._waiting = dict()
+        self._dependents = dict()
+        self._dependencies = dict()
+        self._ready = deque()
+        self._running = set()
+        self._finished = dict()
+
+    @property
+    def running(self):
+        return list(self._running)
+
+    @property
+    def done(self):
+        return len(self._pending) == 0
+
+    def dependencies(self, step):
+        """
+        :return: steps which should be finished before step is started
+        """
+        if step.depends_on is None:
+            previous = self._sequence.previous_step(step)
+            return [] if previous is None else [previous]
+        result = list()
+        for name in step.depends_on:
+            dependency = self._sequence.last_before(name, step)
+            if dependency is None:
+                raise ValueError("Step {step} depends on step {name} which is not registered before it".format(
+                    step=step.name, name=name))
+            result.append(dependency)
+        return result
+
+    def add(self, step):
+        dependencies = self.dependencies(step)
+        self._dependencies[step] = dependencies
+        self._pending.add(step)
+        waiting = 0
+        for dependency in dependencies:
+            if dependency in self._pending:
+                self._dependents.setdefault(dependency, list()).append(step)
+                waiting += 1
+        if waiting > 0:
+            self._waiting[step] = waiting
+        else:
+            self._ready.append(step)
+
+    def has_ready(self):
+        return len(self._ready) > 0
+
+    def start_next(self):
+        step = self._ready.popleft()
+        self._running.add(step)
+        return step
+
+    def finish(self, step, now):
+        self._pending.discard(step)
+        self._running.discard(step)
+        self._finished[step] = now
+        for dependent in self._dependents.pop(step, ()):
+            self._waiting[dependent] -= 1
+            if self._waiting[dependent] == 0:
+                del self._waiting[dependent]
+                self._ready.append(dependent)
+
+    def finish_time(self, step):
+        return self._finished.get(step)
+
+    def critical_path(self):
+        """
+        Chain of steps which determined run time: the last finished step, its dependency which
+        was finished last and so on. Of steps finished at the same time the later one is taken
+        """
+        if len(self._finished) == 0:
+            return []
+        step = max(reversed(list(self._finished)), key=self._finished.get)
+        path = [step]
+        while True:
+            dependencies = [dependency for dependency in self._dependencies[step] if dependency in self._finished]
+            if len(dependencies) == 0:
+                break
+            step = max(reversed(dependencies), key=self._finished.get)
+            path.append(step)
+        path.reverse()
+        return path
@@ -4,29 +4,61 @@ from __future__ import absolute_import
 
 from sys import stdout
 import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from copy import copy
 from datetime import datetime
+from functools import partial
 
 from reactor import Reactor
 
-from ._Step import Step
+from ._AsyncioReactor import AsyncioReactor
+from ._Deadline import DeadlineRecord, _Watchdog
+from ._Context import Context
+from ._Checkpoint import Checkpoint, read_checkpoint, restore_checkpoint, write_checkpoint
+from ._ExpectedCache import ExpectedCache
+from ._Notice import Notice
+from ._ParallelGroup import ParallelGroup
+from ._Reporter import write_steps
+from ._Step import State, Step
+from ._StepGraph import StepGraph
+from ._StepSequence import StepSequence
+from ._VirtualReactor import VirtualReactor
 
 
 class StepManager(object):
     """
     @ivar bool careful: Determine careful duration calculation (without except action run)
+    @cvar float POLL_INTERVAL: how often completion of executor futures is checked by reactor
     """
 
+    POLL_INTERVAL = 0.01
+    THREAD_WORKERS = None
+    PROCESS_WORKERS = None
+
     def __init__(self, careful=False, unfinished_except=True):
         self._log = logging.getLogger("step_manager")
-        self._steps = list()
-        self._backlog = list()
+        self._steps = StepSequence()
+        self._backlog = deque()
+        self._queued = set()
+        self._not_started = dict()
         self._completed = False
         self._exec_after = None
         self.__warnings = list()
         self.__alerts = list()
+        self._parent_step = None
+        self._current = None
+        self._cancelled = False
+        self._executors = dict()
+        self._hooks = list()
+        self._expected_cache = None
+        self._checkpoint = None
+        self._resumed = set()
+        self._deadline_records = list()
+        self._graph = None
+        self._uncompleted_reported = False
         self._duration = 0.0
-        self._context = dict()
+        self._context = Context()
         self._careful = careful
         self._unfinished_except = unfinished_except
         self.level = 0
@@ -35,9 +67,19 @@ class StepManager(object):
     def completed(self):
         return self._completed
 
-    def log(self, level, message):
-        message = ".." * self.level + str(message)
-        self._log.log(level=level, msg=message)
+    def log_enabled(self, level):
+        return self._log.isEnabledFor(level)
+
+    def log(self, level, message, *args, **kwargs):
+        """
+        Log message with indentation of step manager level. Message is formatted with
+        args and kwargs only if logging of given level is enabled
+        """
+        if not self._log.isEnabledFor(level):
+            return
+        if args or kwargs:
+            message = message.format(*args, **kwargs)
+        self._log.log(level, "%s%s", ".." * self.level, message)
 
     def set_duration(self, duration):
         self._duration = duration
@@ -45,6 +87,95 @@ class StepManager(object):
     def get_duration(self):
         return self._duration
 
+    def set_parent_step(self, step):
+        """
+        Set step which owns this step manager as substeps, notices are propagated to it and
+        context values of its step manager are visible in this one
+        """
+        self._parent_step = step
+        self._context.set_parent(None if step is None else step.get_context())
+        # Contexts of substeps are linked again as they may belong to other tree before
+        for s in self._steps:
+            if isinstance(s, ParallelGroup):
+                for child in s.children:
+                    if child.sm is not None:
+                        child.sm.set_parent_step(child)
+            if s.sm is not None:
+                s.sm.set_parent_step(s)
+
+    def get_parent_step(self):
+        return self._parent_step
+
+    def get_path(self):
+        """
+        Names of parent steps from main step manager down to step owning this step manager
+        """
+        if self._parent_step is None:
+            return ()
+        return self._parent_step.path
+
+    def add_hook(self, hook):
+        """
+        Register instrumentation hook (see StepHook), hooks are shared with substeps managers
+        """
+        self._hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook):
+        self._hooks.remove(hook)
+
+    @property
+    def instrumented(self):
+        return len(self._hooks) > 0
+
+    def _emit(self, event, *args):
+        for hook in self._hooks:
+            getattr(hook, event)(*args)
+
+    def _inherit(self, sm):
+        """
+        Take runtime settings of step manager which starts this one as substeps
+        """
+        self.level = sm.level + 1
+        self._hooks = sm._hooks
+        self._checkpoint = sm._checkpoint
+        self._deadline_records = sm._deadline_records
+
+    def clone(self):
+        """
+        Create independent copy of step manager to be tailored for another test case. Steps are
+        copied without run state, their action kwargs and expecteds are shared with this step
+        manager until the copy adds expecteds or runs them. Substeps are cloned recursively,
+        hooks and context are copied shallowly
+
+        :rtype: StepManager
+        """
+        sm = copy(self)
+        sm._steps = StepSequence()
+        sm._backlog = deque()
+        sm._queued = set()
+        sm._not_started = dict()
+        sm._completed = False
+        sm.__warnings = list()
+        sm.__alerts = list()
+        sm._parent_step = None
+        sm._current = None
+        sm._cancelled = False
+        sm._executors = dict()
+        sm._hooks = list(self._hooks)
+        sm._expected_cache = None
+        sm._checkpoint = None
+        sm._resumed = set()
+        sm._deadline_records = list()
+        sm._graph = None
+        sm._uncompleted_reported = False
+        sm._context = self._context.copy()
+        for step in self._steps:
+            step = step.clone(sm)
+            sm._steps.append(step)
+            sm._not_started[step] = None
+        return sm
+
     def set_exec_after(self, exec_after):
         self._exec_after = exec_after
 
@@ -52,35 +183,31 @@ class StepManager(object):
         return self._exec_after
 
     def find_step_index(self, name):
-        for i in range(len(self._steps)):
-            if self._steps[i].name == name:
-                return i
-        return -1
+        step = self._steps.first(name)
+        if step is None:
+            return -1
+        return self._steps.index(step)
 
     def find_last_step_index(self, name):
-        step = -1
-        for i in range(len(self._steps)):
-            if self._steps[i].name == name:
-                step = i
-        return step
+        step = self._steps.last(name)
+        if step is None:
+            return -1
+        return self._steps.index(step)
 
     def find_step(self, name):
-        for step in self._steps:
-            if step.name == name:
-                return step
-        raise Exception("No step with name {name} found".format(name=name))
-    
+        step = self._steps.first(name)
+        if step is None:
+            raise Exception("No step with name {name} found".format(name=name))
+        return step
+
     def rfind_step(self, name):
-        for step in reversed(self._steps):
-            if step.name == name:
-                return step
-        raise Exception("No step with name {name} found".format(name=name))
+        step = self._steps.last(name)
+        if step is None:
+            raise Exception("No step with name {name} found".format(name=name))
+        return step
 
     def find_steps(self, name):
-        steps = list()
-        for step in self._steps:
-            if step.name == name:
-                steps.append(step)
+        steps = self._steps.all(name)
         if len(steps) == 0:
             raise Exception("No step with name {name} found".format(name=name))
         else:
@@ -88,274 +215,635 @@ class StepManager(object):
 
     def add_substep(self, step_name, substep_name, action=None, duration=0.0, interval=0, attempts=1,
                     throw_except=False, **kwargs):
-        start = datetime.now()
-        self._log.debug("Try to add substep to step with name {step_name} at {start}".format(step_name=step_name,
-                                                                                             start=start))
+        debug = self._log.isEnabledFor(logging.DEBUG)
+        if debug:
+            start = datetime.now()
+            self._log.debug("Try to add substep to step with name %s at %s", step_name, start)
         step = self.find_step(name=step_name)
         substep_step = step.add_substep(name=substep_name, action=action, duration=duration,
                                         interval=interval, attempts=attempts,
                                         throw_except=throw_except, **kwargs)
-        stop = datetime.now()
-        took = stop - start
-        self._log.debug("Step added took {took}".format(took=took))
+        if debug:
+            self._log.debug("Step added took %s", datetime.now() - start)
         return substep_step
 
     @staticmethod
     def createStepManager():
         return StepManager()
 
-    def add_step(self, name, action=None, duration=0.0, interval=0, attempts=1, throw_except=False, **kwargs):
-        start = datetime.now()
-        self._log.debug("Try to add step with name {step_name} at {start}".format(step_name=name, start=start))
+    def add_step(self, name, action=None, duration=0.0, interval=0, attempts=1, throw_except=False, executor=None,
+                 retry=None, deadline=None, depends_on=None, **kwargs):
+        """
+        :param deadline: Deadline or seconds since step start after which step is reported (and
+            skipped if Deadline.skip is set)
+        :param depends_on: names of steps registered before this one which should be finished before
+            it is started. Step without depends_on waits for previous step, once any step declares
+            dependencies ready steps are executed concurrently
+        """
+        debug = self._log.isEnabledFor(logging.DEBUG)
+        if debug:
+            start = datetime.now()
+            self._log.debug("Try to add step with name %s at %s", name, start)
         step = Step(owner=self, name=name, action=action, duration=duration, interval=interval, attempts=attempts,
-                    throw_except=throw_except, **kwargs)
+                    throw_except=throw_except, executor=executor, retry=retry, deadline=deadline,
+                    depends_on=depends_on, **kwargs)
         self._steps.append(step)
-        stop = datetime.now()
-        took = stop-start
-        self._log.debug("Step added took {took}".format(took=took))
+        self._not_started[step] = None
+        if debug:
+            self._log.debug("Step added took %s", datetime.now() - start)
         return step
 
+    def _forget(self, steps):
+        for step in steps:
+            self._not_started.pop(step, None)
+            self._resumed.discard(step)
+
+    def add_parallel_group(self, name, duration=0.0, fail_fast=False, deadline=None, depends_on=None):
+        """
+        Add group of steps which are started together. Child steps are added with
+        ParallelGroup.add_step and keep own attempts, interval, duration and substeps
+
+        :param name: name of the group step
+        :param duration: timeout after all children are finished
+        :param fail_fast: finish group as soon as first child finishes not passed
+        :param deadline: Deadline or seconds limit of the whole group
+        :param depends_on: names of steps which should be finished before group is started
+        :rtype: ParallelGroup
+        """
+        group = ParallelGroup(owner=self, name=name, duration=duration, fail_fast=fail_fast, deadline=deadline,
+                              depends_on=depends_on)
+        self._steps.append(group)
+        self._not_started[group] = None
+        return group
+
     def remove_step(self, step_name):
-        self._steps.remove(self.find_step(step_name))
+        self._forget(self._steps.remove(self.find_step(step_name)))
 
     def remove_step_from_bottom(self, step_name):
-        self._steps.remove(self.rfind_step(step_name))
+        self._forget(self._steps.remove(self.rfind_step(step_name)))
 
     def remove_steps_between(self, start_step, stop_step):
-        remove = False
-        for step in reversed(self._steps):
-            if step.name == stop_step:
-                remove = True
-                self._steps.remove(step)
-            elif step.name == start_step:
-                self._steps.remove(step)
-                break
-            elif remove:
-                self._steps.remove(step)
+        """
+        Remove steps from the last start_step up to the last stop_step inclusive. If start_step
+        is missing then all steps up to stop_step are removed
+        """
+        stop = self._steps.last(stop_step)
+        start = None
+        if start_step != stop_step:
+            start = self._steps.last(start_step)
+        if start is not None and (stop is None or self._steps.precedes(stop, start)):
+            self._forget(self._steps.remove(start))
+        elif stop is not None:
+            self._forget(self._steps.remove_range(start or next(iter(self._steps)), stop))
+
+    def remove_range(self, start_step, stop_step):
+        """
+        Remove steps from the first step with name start_step up to the first step with name
+        stop_step placed after it (inclusive). Cost is proportional to the removed range
+
+        :return: list of removed steps
+        """
+        start = self.find_step(start_step)
+        stop = self._steps.first_after(stop_step, start)
+        if stop is None:
+            raise ValueError("No step with name {stop_step} registered after step {start_step}".
+                             format(stop_step=stop_step, start_step=start_step))
+        removed = self._steps.remove_range(start, stop)
+        self._forget(removed)
+        return removed
+
+    def splice_steps(self, sm, after_step=None):
+        """
+        Move all steps of other step manager into this one after the last step with name
+        after_step (or to the beginning if after_step is None). Other step manager is left empty
+
+        :param StepManager sm: step manager which steps should be moved
+        """
+        after = None
+        if after_step is not None:
+            after = self._steps.last(after_step)
+            if after is None:
+                raise ValueError("No step with name {after_step} registered in step manager".
+                                 format(after_step=after_step))
+        steps = list(sm._steps)
+        if len(steps) > 0:
+            sm._forget(sm._steps.remove_range(steps[0], steps[-1]))
+        for step in steps:
+            step.set_owner(self)
+            if not step.start_info_provided:
+                self._not_started[step] = None
+        self._steps.splice(steps, after=after)
+        return steps
 
     def add_step_after(self, after_step, name, action=None, duration=0.0, **kwargs):
-        start = datetime.now()
-        self._log.debug("Try to add step with name {step_name} after step {after_step} at {start}".
-                        format(step_name=name, after_step=after_step, start=start))
-        after_step_index = self.find_last_step_index(after_step)
-        if after_step_index == -1:
+        debug = self._log.isEnabledFor(logging.DEBUG)
+        if debug:
+            start = datetime.now()
+            self._log.debug("Try to add step with name %s after step %s at %s", name, after_step, start)
+        after = self._steps.last(after_step)
+        if after is None:
             raise ValueError("No step with name {after_step} registered in step manager".format(after_step=after_step))
         step = Step(self, name, action, duration, **kwargs)
-        self._steps.insert(after_step_index + 1, step)
-        stop = datetime.now()
-        took = stop - start
-        self._log.debug("Step added took {took}".format(took=took))
+        self._steps.insert_after(after, step)
+        self._not_started[step] = None
+        if debug:
+            self._log.debug("Step added took %s", datetime.now() - start)
         return step
     
     def add_step_before(self, before_step, name, action=None, duration=0.0, **kwargs):
-        start = datetime.now()
-        self._log.debug("Try to add step with name {step_name} before step {before_step} at {start}".
-                        format(step_name=name, before_step=before_step, start=start))
-        before_step_index = self.find_last_step_index(before_step)
-        if before_step_index == -1:
+        debug = self._log.isEnabledFor(logging.DEBUG)
+        if debug:
+            start = datetime.now()
+            self._log.debug("Try to add step with name %s before step %s at %s", name, before_step, start)
+        before = self._steps.last(before_step)
+        if before is None:
             raise ValueError("No step with name {before_step} registered in step manager".format(before_step=before_step))
         step = Step(self, name, action, duration, **kwargs)
-        self._steps.insert(before_step_index, step)
-        stop = datetime.now()
-        took = stop - start
-        self._log.debug("Step added took {took}".format(took=took))
+        self._steps.insert_before(before, step)
+        self._not_started[step] = None
+        if debug:
+            self._log.debug("Step added took %s", datetime.now() - start)
         return step
 
-    def run(self, timeout=180):
-        react = Reactor()
+    def get_executor(self, executor):
+        """
+        Return pool to run blocking actions and expecteds off the reactor loop. Pools are created
+        on first use and shared with substeps managers. Process pool requires picklable actions
+        and params
+
+        :param executor: "thread", "process" or concurrent.futures.Executor instance
+        """
+        if not isinstance(executor, str):
+            return executor
+        if self._parent_step is not None:
+            return self._parent_step.get_executor(executor)
+        pool = self._executors.get(executor)
+        if pool is None:
+            if executor == "thread":
+                pool = ThreadPoolExecutor(max_workers=self.THREAD_WORKERS)
+            elif executor == "process":
+                pool = ProcessPoolExecutor(max_workers=self.PROCESS_WORKERS)
+            else:
+                raise ValueError("Unknown executor {executor}".format(executor=executor))
+            self._executors[executor] = pool
+        return pool
+
+    def get_expected_cache(self):
+        """
+        Return cache of expected results shared by main step manager and substeps managers
+        """
+        if self._parent_step is not None:
+            return self._parent_step.get_expected_cache()
+        if self._expected_cache is None:
+            self._expected_cache = ExpectedCache()
+        return self._expected_cache
+
+    def invalidate_expected(self, method=None, **kwargs):
+        """
+        Drop cached expected results, e.g. from action which changes state checked by expecteds
+
+        :param method: expected method, all results are dropped if not provided
+        :param kwargs: drop only result of method called with these kwargs
+        """
+        self.get_expected_cache().invalidate(method, **kwargs)
+
+    def shutdown_executors(self, wait=False):
+        for pool in self._executors.values():
+            pool.shutdown(wait=wait)
+        self._executors = dict()
+
+    def run(self, timeout=180, virtual=False):
+        """
+        Run scenario until it is completed or timeout is expired
+
+        :param virtual: use simulated clock, delays are skipped while step times report simulated time
+        """
+        react = VirtualReactor() if virtual else Reactor()
+        react.call_later(0.0, self.start)
+        try:
+            react.run(timeout)
+        finally:
+            self.shutdown_executors()
+        self._check_completed()
+
+    async def run_async(self, timeout=180):
+        """
+        Run scenario on running asyncio loop. Actions and expecteds may be coroutine functions,
+        many step managers may be run concurrently on the same loop
+        """
+        react = AsyncioReactor()
         react.call_later(0.0, self.start)
-        react.run(timeout)
+        try:
+            if not await react.wait(timeout):
+                self.cancel()
+        finally:
+            self.shutdown_executors()
+        self._check_completed()
+
+    def set_checkpoint(self, path, interval=60.0):
+        """
+        Save run state to file while scenario is running, so it can be continued with resume
+        after crash of the process. State is saved when step finishes if interval seconds of
+        reactor time passed since previous save and when scenario is finished
+
+        :param path: path of checkpoint file
+        :param interval: minimal time between saves
+        """
+        self._checkpoint = Checkpoint(self, path, interval)
+
+    def save_checkpoint(self, path):
+        """
+        Save run state: finished steps with states, times and notices and context values which
+        can be written as JSON
+        """
+        write_checkpoint(self, path)
+
+    def resume(self, path, timeout=180, virtual=False):
+        """
+        Restore run state saved to checkpoint and run steps which were not finished. Step manager
+        should be built with the same steps as saved one, steps are matched by names. Steps which
+        were running when checkpoint was saved are executed again from the beginning
+        """
+        restore_checkpoint(self, read_checkpoint(path))
+        react = VirtualReactor() if virtual else Reactor()
+        react.call_later(0.0, self._resume)
+        try:
+            react.run(timeout)
+        finally:
+            self.shutdown_executors()
+        self._check_completed()
+
+    def _check_completed(self):
         if not self._completed:
+            msg = self._timeout_message()
             if self._unfinished_except:
-                raise Exception("StepManager finished because of timeout")
+                raise Exception(msg)
             else:
-                self.collect_warnings()
-                self.__warnings.append("StepManager finished because of timeout")
+                self.register_warning(msg)
+
+    def _timeout_message(self):
+        """
+        Message about timeout of run with path of the deepest step which is being executed
+        """
+        step = None
+        sm = self
+        while sm is not None and sm._current is not None:
+            step = sm._current
+            sm = step.sm
+        if step is None:
+            return "StepManager finished because of timeout"
+        return "StepManager finished because of timeout in step {path}".format(path=": ".join(step.path))
+
+    def get_deadline_records(self):
+        """
+        Steps of this step manager and its substeps which exceeded deadline
+
+        :rtype: list[DeadlineRecord]
+        """
+        return list(self._deadline_records)
 
     def start(self, reactor):
-        self._backlog = list(self._steps)
-        reactor.call_later(0.0, self._iteration)
+        self._backlog = deque(self._steps)
+        self._queued = set(self._backlog)
+        self._schedule(reactor)
+
+    def _schedule(self, reactor):
+        """
+        Start execution of backlog, steps are executed one by one unless some of them declare dependencies
+        """
+        self._graph = None
+        if any(step.depends_on is not None for step in self._backlog):
+            self._graph = StepGraph(self._steps)
+            for step in self._backlog:
+                self._graph.add(step)
+            self._backlog = deque()
+            self._queued = set()
+            reactor.call_later(0.0, self._dispatch)
+        else:
+            reactor.call_later(0.0, self._iteration)
 
-    def continue_execution(self, timeout=180):
-        react = Reactor()
+    def continue_execution(self, timeout=180, virtual=False):
+        react = VirtualReactor() if virtual else Reactor()
         react.call_later(0.0, self._continue_exection)
-        react.run(timeout)
-    
+        try:
+            react.run(timeout)
+        finally:
+            self.shutdown_executors()
+
     def update_backlog(self):
-        for step in self._steps:
-            if not step.start_info_provided:
+        """
+        Queue steps which were not started yet and are not queued already
+        """
+        steps = [step for step in self._not_started if step not in self._queued]
+        for step in self._steps.ordered(steps):
+            if self._graph is not None:
+                self._graph.add(step)
+            else:
                 self._backlog.append(step)
+            self._queued.add(step)
 
     def _continue_exection(self, reactor):
-        self._backlog = list()
-        for step in self._steps:
-            if not step.start_info_provided:
-                self._backlog.append(step)
-        reactor.call_later(0.0, self._iteration)
+        self._backlog = deque(self._steps.ordered(self._not_started))
+        self._queued = set(self._backlog)
+        self._schedule(reactor)
 
-    def has_warnings(self):
-        self.collect_warnings()
-        if len(self.__warnings) > 0:
-            return True
+    def _resume(self, reactor):
+        self._backlog = deque(self._steps.ordered(list(self._not_started) + list(self._resumed)))
+        self._queued = set(self._backlog)
+        self._schedule(reactor)
+
+    def register_warning(self, msg):
+        """
+        Register warning which is not related to any step
+        """
+        self._notice_registered(Notice(path=(), message=msg, level=Notice.WARNING))
+
+    def _notice_registered(self, notice):
+        if notice.level == Notice.ALERT:
+            self.__alerts.append(notice)
         else:
-            return False
+            self.__warnings.append(notice)
+        if self._parent_step is not None:
+            self._parent_step._add_notice(notice.prefixed(self._parent_step.name))
+
+    def has_warnings(self):
+        return len(self.__warnings) > 0
 
     def has_alerts(self):
-        self.collect_alerts()
-        if len(self.__alerts) > 0:
-            return True
-        else:
-            return False
+        return len(self.__alerts) > 0
+
+    def get_warning_records(self):
+        return list(self.__warnings)
+
+    def get_alert_records(self):
+        return list(self.__alerts)
 
     def collect_warnings(self):
-        if len(self.__warnings) > 0:
-            return self.__warnings
-        for step in self._steps:
-            step_warnings = step.collect_warnings()
-            for warning in step_warnings:
-                self.__warnings.append(warning)
-        return self.__warnings
+        return [str(notice) for notice in self.__warnings]
 
     def collect_alerts(self):
-        if len(self.__alerts) > 0:
-            return self.__alerts
-        for step in self._steps:
-            step_alerts = step.collect_alerts()
-            for alert in step_alerts:
-                self.__alerts.append(alert)
-        return self.__alerts
+        return [str(notice) for notice in self.__alerts]
 
     def get_warnings(self):
-        self.collect_warnings()
-        if not self._completed:
-            self.__warnings.append("Step manager wasn't completed")
-        warning_string = ""
-        for warning in self.__warnings:
-            warning_string += "\n" + warning
-        return warning_string
+        if not self._completed and not self._uncompleted_reported:
+            self._uncompleted_reported = True
+            self.register_warning("Step manager wasn't completed")
+        return "".join("\n" + str(notice) for notice in self.__warnings)
 
     def get_alerts(self):
-        self.collect_alerts()
-        alerts_string = ""
-        for alert in self.__alerts:
-            alerts_string += "\n" + alert
-        return alerts_string
+        return "".join("\n" + str(notice) for notice in self.__alerts)
+
+    def cancel(self):
+        """
+        Cancel execution of this step manager and currently executed step
+        """
+        self._cancelled = True
+        if self._graph is not None:
+            for step in self._graph.running:
+                step.cancel()
+        elif self._current is not None:
+            self._current.cancel()
 
     def _iteration(self, reactor):
+        if self._cancelled:
+            return
         # If no step left then reactor should be stopped
         if len(self._backlog) == 0:
+            self._current = None
             self.stop(reactor)
         else:
             # Get first step in queue
-            step = self._backlog[0]
-            if not step.start_info_provided:
-                step.start_info_provided = True
-                self.log(logging.INFO, "{name} :: step execution started".format(name=step.name))
-            # Save reactor start time for step
-            if step.start_time is None:
-                step.set_start_time(reactor.seconds())
-            try:
-                # Run step
-                step.run()
-            except Exception as err:
-                self.log(logging.ERROR,
-                         "{name} :: step execution failed, reason: {err!r}".format(name=step.name, err=err))
-                raise
-            else:
-                if not step.repeat:
-                    # Save step stop time if no exceptions happen
-                    step.set_stop_time(reactor.seconds())
-                    self.log(logging.INFO, "{name} :: step execution finished in {sec} seconds".
-                             format(name=step.name, sec="%.3f" % (step.stop_time - step.start_time)))
-            if step.repeat:
-                reactor.call_later(step.interval, self._iteration)
-            else:
-                if self._careful:
-                    new_duration = step.duration - step.seconds
-                else:
-                    new_duration = step.duration
-                # If step has substeps then run start step manager with substeps
-                if step.sm is not None:
-                    step.sm.level = self.level + 1
-                    self.log(logging.INFO, ".Substeps from step with name '{name}' started".
-                             format(name=step.name, time="%.3f" % reactor.seconds()))
-                    step.sm.set_exec_after(self._iteration)
-                    # Careful with timeout between steps
-                    step.sm.set_duration(step.duration)
-                    self._backlog.pop(0)
-                    reactor.call_later(0.0, step.sm.start)
-                else:
-                    self.log(logging.INFO,
-                             ".Next step will be started after {dur} seconds timeout".format(dur=new_duration))
-                    self._backlog.pop(0)
-                    reactor.call_later(new_duration, self._iteration)
+            step = self._backlog.popleft()
+            self._queued.discard(step)
+            self._current = step
+            self._execute(step, reactor, then=self._iteration)
+
+    def _dispatch(self, reactor):
+        if self._cancelled:
+            return
+        while self._graph.has_ready():
+            step = self._graph.start_next()
+            self._queued.discard(step)
+            self._current = step
+            self._execute(step, reactor, then=partial(self._graph_step_done, step))
+        if self._graph.done:
+            self._current = None
+            self.stop(reactor)
+
+    def _graph_step_done(self, step, reactor):
+        self._graph.finish(step, reactor.seconds())
+        self._dispatch(reactor)
+
+    def get_critical_path(self):
+        """
+        Chain of steps which determined time of the last run: the last finished step, its
+        dependency which was finished last and so on. All finished steps form the chain if
+        step manager has no dependencies
+        """
+        if self._graph is None:
+            return [step for step in self._steps if step.stop_time is not None]
+        return self._graph.critical_path()
+
+    def report_critical_path(self, stream=None):
+        """
+        Write critical path with start and finish time of every step (finish includes duration
+        and substeps if step manager has dependencies)
+        """
+        if not stream:
+            stream = stdout
+        path = self.get_critical_path()
+        for step in path:
+            finish = step.stop_time if self._graph is None else self._graph.finish_time(step)
+            stream.write("{path} started {start:.3f} finished {finish:.3f} ({seconds:.3f} seconds)\n".format(
+                path=": ".join(step.path), start=step.start_time, finish=finish, seconds=finish - step.start_time))
+        if path:
+            stream.write("Critical path: {count} steps\n".format(count=len(path)))
+
+    def _execute(self, step, reactor, then):
+        """
+        Execute step with all its attempts and substeps, then call `then` with reactor
+        after step duration
+        """
+        if step in self._resumed:
+            # Step was finished before checkpoint was saved, only its substeps are left
+            self._resumed.discard(step)
+            self._start_substeps(step, reactor, then, step.sm._resume)
+            return
+        if not step.start_info_provided:
+            step.start_info_provided = True
+            self._not_started.pop(step, None)
+            self.log(logging.INFO, "{name} :: step execution started", name=step.name)
+        # Save reactor start time for step
+        if step.start_time is None:
+            step.set_start_time(reactor.seconds())
+        if self._hooks:
+            self._emit("on_step_start", step, reactor.seconds())
+        if step.deadline is not None:
+            then = _Watchdog(then)
+            reactor.call_later(step.deadline.seconds, partial(self._deadline_expired, step, watchdog=then))
+        if isinstance(step, ParallelGroup):
+            self.log(logging.INFO, ".Parallel steps from group '{name}' started", name=step.name)
+            for child in step.start():
+                reactor.call_later(0.0, partial(self._execute, child,
+                                                then=partial(self._child_finished, step, child, then)))
+            if len(step.children) == 0:
+                self._finish(step, reactor, then)
+        else:
+            self._attempt(step, reactor, then)
+
+    def _attempt(self, step, reactor, then, resumed=False):
+        if step.cancelled:
+            return
+        if self._hooks and not resumed:
+            self._emit("on_attempt_start", step, step.attempts_used + 1, reactor.seconds())
+        try:
+            # Run step
+            step.run(now=reactor.seconds())
+        except Exception as err:
+            self.log(logging.ERROR, "{name} :: step execution failed, reason: {err!r}", name=step.name, err=err)
+            raise
+        if step.pending is not None:
+            self._when_done(reactor, future=step.pending,
+                            callback=partial(self._attempt, step, then=then, resumed=True))
+            return
+        if self._hooks:
+            self._emit("on_attempt_stop", step, step.attempts_used, reactor.seconds())
+        if step.repeat:
+            retry = partial(self._retry, step, then=then, parked=reactor.seconds())
+            token = step.park(waker=lambda: reactor.call_later(0.0, partial(retry, token=token)))
+            reactor.call_later(step.interval, partial(retry, token=token))
+        else:
+            self._finish(step, reactor, then)
+
+    def _retry(self, step, reactor, then, token, parked):
+        # Step may be already resumed by event expected or by retry interval
+        if step.wake(token):
+            if self._hooks and not step.cancelled:
+                # Event expected may wake step before interval is over
+                self._emit("on_wait", step, "interval", reactor.seconds() - parked)
+            self._attempt(step, reactor, then)
+
+    def _deadline_expired(self, step, reactor, watchdog):
+        deadline = step.deadline
+        if watchdog.finished or step.cancelled or deadline.is_met(step):
+            return
+        elapsed = reactor.seconds() - step.start_time
+        self._deadline_records.append(DeadlineRecord(path=step.path, seconds=deadline.seconds, elapsed=elapsed,
+                                                     attempts=step.attempts_used, skipped=deadline.skip))
+        step.register_warning("Deadline of {seconds} seconds exceeded after {attempts} attempts in {elapsed:.3f} "
+                              "seconds".format(seconds=deadline.seconds, attempts=step.attempts_used, elapsed=elapsed))
+        if deadline.skip:
+            self.log(logging.WARNING, "!{name} :: step skipped because of deadline", name=step.name)
+            step.cancel()
+            if step.state in (State.UNKNOWN, State.PASS):
+                step._state = State.WARN
+            # Step with deadline covering substeps may be already finished
+            if step.stop_time is None:
+                step.set_stop_time(reactor.seconds())
+                if self._hooks:
+                    self._emit("on_step_stop", step, step.stop_time)
+            watchdog(reactor)
+
+    def _when_done(self, reactor, future, callback):
+        """
+        Call callback with reactor once future is done. Reactor is polled if it can not be notified
+        so callback is always executed on reactor loop
+        """
+        if hasattr(reactor, "call_when_done"):
+            reactor.call_when_done(future, callback)
+        elif future.done():
+            reactor.call_later(0.0, callback)
+        else:
+            reactor.call_later(self.POLL_INTERVAL, partial(self._when_done, future=future, callback=callback))
+
+    def _child_finished(self, group, child, then, reactor):
+        if group.child_finished(child):
+            self._finish(group, reactor, then)
+
+    def _finish(self, step, reactor, then):
+        # Save step stop time if no exceptions happen
+        step.set_stop_time(reactor.seconds())
+        self.log(logging.INFO, "{name} :: step execution finished in {sec:.3f} seconds",
+                 name=step.name, sec=step.stop_time - step.start_time)
+        if self._careful:
+            new_duration = step.duration - step.seconds
+        else:
+            new_duration = step.duration
+        if self._hooks:
+            self._emit("on_step_stop", step, step.stop_time)
+            self._emit("on_wait", step, "duration", step.duration if step.sm is not None else new_duration)
+        # If step has substeps then run start step manager with substeps
+        if step.sm is not None:
+            self._start_substeps(step, reactor, then, step.sm.start)
+        else:
+            self.log(logging.INFO, ".Next step will be started after {dur} seconds timeout", dur=new_duration)
+            reactor.call_later(new_duration, then)
+        if self._checkpoint is not None:
+            self._checkpoint.step_finished(reactor.seconds())
+
+    def _start_substeps(self, step, reactor, then, start):
+        step.sm._inherit(self)
+        self.log(logging.INFO, ".Substeps from step with name '{name}' started", name=step.name)
+        step.sm.set_exec_after(then)
+        # Careful with timeout between steps
+        step.sm.set_duration(step.duration)
+        reactor.call_later(0.0, start)
 
     def stop(self, reactor):
         self._completed = True
         if self._exec_after is None:
-            self.log(logging.INFO,
-                     "Main Step Manager finished work at reactor time {time}".format(time="%.2f" % reactor.seconds()))
+            self.log(logging.INFO, "Main Step Manager finished work at reactor time {time:.2f}", time=reactor.seconds())
+            if self._checkpoint is not None:
+                self._checkpoint.save(reactor.seconds())
             reactor.stop()
         else:
             # self.level -= 1  TODO: decrease indentation after subsequence is completed
-            self.log(logging.INFO,
-                     ".Substeps sequence finished work at reactor time {time}".format(time="%.2f" % reactor.seconds()))
-            self.log(logging.INFO,
-                     ".Next step will be started after {dur} seconds timeout".format(dur=self._duration))
+            self.log(logging.INFO, ".Substeps sequence finished work at reactor time {time:.2f}",
+                     time=reactor.seconds())
+            self.log(logging.INFO, ".Next step will be started after {dur} seconds timeout", dur=self._duration)
             reactor.call_later(self._duration, self._exec_after)
 
-    def dump(self, level=0, base_order=None, stream=None):
+    def dump(self, level=0, base_order=None, stream=None, failed_only=False):
+        """
+        Write steps tree to stream line by line
 
+        :param failed_only: write only steps which are not passed and steps which contain them
+        """
         if not stream:
             stream = stdout
 
-        if not base_order:
-            base_order = []
-
-        for number, s in enumerate(self._steps):
-            padding = ".." * level
-            order = copy(base_order)
-            order.append(str(number + 1))
-            step_number = ".".join(order)
-            step_name = s._name
-            step_action = s.action
-            step_expecteds = s._expected
-            step_duration = s.duration
-            step_state = s.state
-            msg = "{padding} {step_number}. {step_name} [{state}] (action={step_action!r} expecteds={step_expecteds!r} duration={step_duration!r})\n".format(
-                padding=padding, step_number=step_number, step_name=step_name, state=step_state,
-                step_action=step_action, step_expecteds=step_expecteds, step_duration=step_duration)
-            stream.write(msg)
-            if s.sm:
-                s.sm.dump(level=level + 1, base_order=order, stream=stream)
+        prefix = "".join(number + "." for number in base_order) if base_order else ""
+        write_steps(self._steps, stream, level=level, prefix=prefix, failed_only=failed_only)
+
+    def get_context(self):
+        """
+        :rtype: Context
+        """
+        return self._context
 
     def get(self, key):
-        res = self._context.get(key)
-        # if res is None:
-        #     raise ValueError("No key {key} was stored".format(key=key))
-        # else:
-        return res
+        return self._context.get(key)
 
     def set(self, key, value, **kwargs):
         if callable(value):
             value = value(**kwargs)
-        self._context[key] = value
+        self._context.set(key, value)
+
+    def set_lazy(self, key, factory, **kwargs):
+        """
+        Store value which is computed by factory called with kwargs on first get
+        """
+        self._context.set_lazy(key, factory, **kwargs)
 
     def add_to_dict(self, dict_name, key, value):
         if callable(value):
             value = value()
-        if dict_name in self._context:
-            self._context.get(dict_name)[key] = value
-        else:
-            self._context[dict_name] = dict((key, value))
+        self._context.add_to_dict(dict_name, key, value)
 
     def add_to_list(self, list_name, value):
         if callable(value):
             value = value()
-        if list_name in self._context:
-            self._context.get(list_name).append(value)
-        else:
-            self._context[list_name] = list(value)
+        self._context.add_to_list(list_name, value)
 
     def call_method_of_stored_value(self, key, method_name, **kwargs):
         link_to_method = getattr(self.get(key), method_name)
@@ -0,0 +1,375 @@
+#
+
+from __future__ import absolute_import
+
+
+class _Node(object):
+
+    __slots__ = ("step", "prev", "next", "label", "chunk")
+
+    def __init__(self, step, label):
+        self.step = step
+        self.prev = None
+        self.next = None
+        self.label = label
+        self.chunk = None
+
+
+class _Chunk(object):
+    """
+    Run of consecutive nodes, leaf of tree of sizes
+    """
+
+    __slots__ = ("first", "size", "parent")
+
+    def __init__(self, first):
+        self.first = first
+        self.size = 0
+        self.parent = None
+
+
+class _Branch(object):
+    """
+    Node of tree of sizes, size is amount of nodes in all chunks below it
+    """
+
+    __slots__ = ("children", "size", "parent")
+
+    def __init__(self, children):
+        self.children = children
+        self.size = 0
+        self.parent = None
+        for child in children:
+            child.parent = self
+            self.size += child.size
+
+
+def _bisect(nodes, label):
+    """
+    Return amount of nodes (sorted by labels) with label lower than given one
+    """
+    low, high = 0, len(nodes)
+    while low < high:
+        middle = (low + high) // 2
+        if nodes[middle].label < label:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class StepSequence(object):
+    """
+    Ordered collection of steps backed by doubly linked list with name index
+
+    Every node carries integer label increasing along the list, so order of two steps
+    can be compared without walking the list. When gap between neighbours is exhausted
+    labels are renumbered in the smallest range around them which has enough room.
+    Nodes with the same name are kept sorted by labels and found by bisection.
+
+    Consecutive nodes are grouped in chunks of up to 2 * CHUNK nodes which are leaves of
+    tree with up to 2 * FANOUT children per branch. Branches keep amount of nodes below
+    them, so position of step is sum of sizes of preceding siblings on the way from its
+    chunk to the root plus offset in chunk, and edit updates sizes on that way only.
+
+    @ivar dict _nodes: step to node map
+    @ivar dict _index: step name to list of nodes in sequence order
+    """
+
+    GAP = 1 << 32
+    CHUNK = 32
+    FANOUT = 16
+
+    def __init__(self):
+        self._head = None
+        self._tail = None
+        self._nodes = dict()
+        self._index = dict()
+        self._root = None
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __iter__(self):
+        node = self._head
+        while node is not None:
+            yield node.step
+            node = node.next
+
+    def __reversed__(self):
+        node = self._tail
+        while node is not None:
+            yield node.step
+            node = node.prev
+
+    def __contains__(self, step):
+        return step in self._nodes
+
+    def first(self, name):
+        same_name = self._index.get(name)
+        if same_name:
+            return same_name[0].step
+        return None
+
+    def last(self, name):
+        same_name = self._index.get(name)
+        if same_name:
+            return same_name[-1].step
+        return None
+
+    def all(self, name):
+        return [node.step for node in self._index.get(name, ())]
+
+    def first_after(self, name, step):
+        """
+        Return first step with given name placed at or after step
+        """
+        same_name = self._index.get(name, ())
+        i = _bisect(same_name, self._nodes[step].label)
+        if i < len(same_name):
+            return same_name[i].step
+        return None
+
+    def last_before(self, name, step):
+        """
+        Return last step with given name placed before step
+        """
+        same_name = self._index.get(name, ())
+        i = _bisect(same_name, self._nodes[step].label)
+        if i > 0:
+            return same_name[i - 1].step
+        return None
+
+    def precedes(self, step, other):
+        return self._nodes[step].label < self._nodes[other].label
+
+    def ordered(self, steps):
+        """
+        Return given steps of this sequence sorted in sequence order
+        """
+        return sorted(steps, key=lambda step: self._nodes[step].label)
+
+    def index(self, step):
+        """
+        Return position of step, cost is logarithmic in amount of steps
+        """
+        node = self._nodes[step]
+        chunk = node.chunk
+        position = 0
+        current = chunk.first
+        while current is not node:
+            current = current.next
+            position += 1
+        child = chunk
+        parent = chunk.parent
+        while parent is not None:
+            for sibling in parent.children:
+                if sibling is child:
+                    break
+                position += sibling.size
+            child = parent
+            parent = parent.parent
+        return position
+
+    def previous_step(self, step):
+        node = self._nodes[step].prev
+        if node is None:
+            return None
+        return node.step
+
+    def next_step(self, step):
+        node = self._nodes[step].next
+        if node is None:
+            return None
+        return node.step
+
+    def append(self, step):
+        self._link(step, self._tail, None)
+
+    def insert_after(self, anchor, step):
+        self._link(step, self._nodes[anchor], self._nodes[anchor].next)
+
+    def insert_before(self, anchor, step):
+        self._link(step, self._nodes[anchor].prev, self._nodes[anchor])
+
+    def remove(self, step):
+        return self.remove_range(step, step)
+
+    def remove_range(self, first, last):
+        """
+        Remove steps from first up to last inclusive, cost is proportional to removed range
+
+        :return: list of removed steps
+        """
+        node = self._nodes[first]
+        stop = self._nodes[last]
+        if node.label > stop.label:
+            raise ValueError("Step {last} is placed before step {first}".format(first=first.name, last=last.name))
+        removed = list()
+        while True:
+            removed.append(node.step)
+            if node is stop:
+                break
+            node = node.next
+        before = self._nodes[first].prev
+        after = stop.next
+        if before is None:
+            self._head = after
+        else:
+            before.next = after
+        if after is None:
+            self._tail = before
+        else:
+            after.prev = before
+        for step in removed:
+            node = self._nodes.pop(step)
+            self._unchunk(node, after)
+            same_name = self._index[step.name]
+            del same_name[_bisect(same_name, node.label)]
+            if len(same_name) == 0:
+                del self._index[step.name]
+        return removed
+
+    def splice(self, steps, after=None):
+        """
+        Insert steps one by one after step given as anchor (or at the beginning)
+
+        Cost is proportional to amount of inserted steps
+        """
+        prev = None if after is None else self._nodes[after]
+        for step in steps:
+            nxt = self._head if prev is None else prev.next
+            self._link(step, prev, nxt)
+            prev = self._nodes[step]
+
+    def _link(self, step, prev, nxt):
+        if step in self._nodes:
+            raise ValueError("Step {name} is already registered in sequence".format(name=step.name))
+        if prev is None and nxt is None:
+            label = 0
+        elif nxt is None:
+            label = prev.label + self.GAP
+        elif prev is None:
+            label = nxt.label - self.GAP
+        else:
+            label = (prev.label + nxt.label) // 2
+            if label == prev.label:
+                self._relabel(prev)
+                label = (prev.label + nxt.label) // 2
+        node = _Node(step, label)
+        node.prev = prev
+        node.next = nxt
+        if prev is None:
+            self._head = node
+        else:
+            prev.next = node
+        if nxt is None:
+            self._tail = node
+        else:
+            nxt.prev = node
+        self._nodes[step] = node
+        self._chunk(node)
+        same_name = self._index.setdefault(step.name, list())
+        same_name.insert(_bisect(same_name, label), node)
+
+    @staticmethod
+    def _resize(item, delta):
+        while item is not None:
+            item.size += delta
+            item = item.parent
+
+    def _chunk(self, node):
+        """
+        Add linked node to chunk of its neighbour, chunk is split in halves when it becomes too big
+        """
+        if node.prev is not None:
+            chunk = node.prev.chunk
+        elif node.next is not None:
+            chunk = node.next.chunk
+            chunk.first = node
+        else:
+            chunk = _Chunk(node)
+            self._root = _Branch([chunk])
+        node.chunk = chunk
+        self._resize(chunk, 1)
+        if chunk.size > 2 * self.CHUNK:
+            first = chunk.first
+            for _ in range(self.CHUNK):
+                first = first.next
+            half = _Chunk(first)
+            half.size = chunk.size - self.CHUNK
+            chunk.size = self.CHUNK
+            current = first
+            while current is not None and current.chunk is chunk:
+                current.chunk = half
+                current = current.next
+            self._add_child(chunk, half)
+
+    def _add_child(self, item, new):
+        """
+        Place new item of tree after item, branch is split in halves when it has too many children
+        """
+        branch = item.parent
+        children = branch.children
+        children.insert(children.index(item) + 1, new)
+        new.parent = branch
+        if len(children) > 2 * self.FANOUT:
+            half = _Branch(children[self.FANOUT:])
+            del children[self.FANOUT:]
+            branch.size -= half.size
+            if branch.parent is None:
+                self._root = _Branch([branch, half])
+            else:
+                self._add_child(branch, half)
+
+    def _unchunk(self, node, after):
+        """
+        Remove unlinked node from its chunk
+
+        :param after: node which followed removed range
+        """
+        chunk = node.chunk
+        self._resize(chunk, -1)
+        if chunk.size > 0:
+            if chunk.first is node:
+                # Remaining nodes of chunk follow removed range
+                chunk.first = after
+            return
+        item = chunk
+        while item.parent is not None:
+            branch = item.parent
+            branch.children.remove(item)
+            if branch.children or branch is self._root:
+                break
+            item = branch
+
+    def _relabel(self, node):
+        """
+        Spread labels evenly in range around node. Range is doubled until labels around it
+        leave gap bigger than amount of its nodes, so dense places are renumbered together
+        with sparse neighbourhood instead of the whole list
+        """
+        first = last = node
+        count = 1
+        while True:
+            for _ in range(count):
+                if first.prev is not None:
+                    first = first.prev
+                    count += 1
+                if last.next is not None:
+                    last = last.next
+                    count += 1
+            # Range touching end of the list may extend labels beyond it
+            low = first.prev.label if first.prev is not None else first.label - self.GAP * count
+            high = last.next.label if last.next is not None else last.label + self.GAP * count
+            gap = (high - low) // (count + 1)
+            if gap > count:
+                break
+        label = low
+        current = first
+        while True:
+            label += gap
+            current.label = label
+            if current is last:
+                break
+            current = current.next
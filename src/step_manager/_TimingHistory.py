@@ -0,0 +1,240 @@
+#
+
+from __future__ import absolute_import
+
+import sqlite3
+import time
+from collections import defaultdict
+
+from ._ParallelGroup import ParallelGroup
+from ._StepGraph import StepGraph
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scenario TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    passed INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_scenario ON runs (scenario, id);
+CREATE TABLE IF NOT EXISTS steps (
+    run INTEGER NOT NULL REFERENCES runs (id),
+    path TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS steps_run ON steps (run);
+"""
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def _key(path):
+    return "/".join(path)
+
+
+def step_timings(sm):
+    """
+    Yield path and seconds of every finished step of step manager tree
+    """
+    for step in sm._steps:
+        if step.stop_time is None:
+            continue
+        yield step.path, step.seconds
+        if isinstance(step, ParallelGroup):
+            for child in step.children:
+                if child.stop_time is not None:
+                    yield child.path, child.seconds
+                if child.sm is not None:
+                    for timing in step_timings(child.sm):
+                        yield timing
+        if step.sm is not None:
+            for timing in step_timings(step.sm):
+                yield timing
+
+
+class TimingRegression(object):
+    """
+    Step or scenario which took longer than its baseline
+
+    @ivar tuple path: names of steps from main step manager down to the step, empty for whole scenario
+    @ivar float baseline: median of previous passed runs
+    """
+
+    def __init__(self, scenario, path, seconds, baseline):
+        self.scenario = scenario
+        self.path = path
+        self.seconds = seconds
+        self.baseline = baseline
+
+    def __repr__(self):
+        return "TimingRegression(scenario={scenario!r}, path={path!r}, seconds={seconds:.3f}, " \
+               "baseline={baseline:.3f})".format(scenario=self.scenario, path=self.path, seconds=self.seconds,
+                                                 baseline=self.baseline)
+
+
+class TimingHistory(object):
+    """
+    Step and scenario durations of previous runs stored in SQLite database. Baseline of step or
+    scenario is median of its durations in the latest passed runs, it is used to predict run
+    time, to order scenarios longest first and to detect timing regressions
+
+    @ivar int window: amount of latest passed runs of scenario used for baseline
+    @ivar int min_runs: amount of runs required before regressions are reported
+    @ivar float threshold: step regressed if it took threshold times longer than baseline
+    @ivar float minimum: step regressed only if it took at least minimum seconds longer than baseline
+    """
+
+    def __init__(self, path=":memory:", window=10, min_runs=3, threshold=1.5, minimum=0.1):
+        self.path = path
+        self.window = window
+        self.min_runs = min_runs
+        self.threshold = threshold
+        self.minimum = minimum
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _samples(self, scenario):
+        """
+        :return: amount of runs and dict of step path key to durations in the latest passed runs
+        """
+        runs = [row[0] for row in self._db.execute(
+            "SELECT id FROM runs WHERE scenario = ? AND passed = 1 ORDER BY id DESC LIMIT ?",
+            (scenario, self.window))]
+        samples = defaultdict(list)
+        if runs:
+            rows = self._db.execute("SELECT path, seconds FROM steps WHERE run IN ({marks})".format(
+                marks=", ".join("?" * len(runs))), runs)
+            for path, seconds in rows:
+                samples[path].append(seconds)
+        return len(runs), samples
+
+    def scenario_seconds(self, scenario):
+        """
+        :return: baseline of scenario duration or None if scenario has no passed runs
+        """
+        durations = [row[0] for row in self._db.execute(
+            "SELECT seconds FROM runs WHERE scenario = ? AND passed = 1 ORDER BY id DESC LIMIT ?",
+            (scenario, self.window))]
+        return _median(durations) if durations else None
+
+    def step_seconds(self, scenario, path):
+        """
+        :return: baseline of step duration or None if step has no history
+        """
+        samples = self._samples(scenario)[1].get(_key(path))
+        return _median(samples) if samples else None
+
+    def durations(self, scenarios=None):
+        """
+        Baselines of scenarios which have history, can be given to ProcessScenarioRunner
+
+        :param scenarios: names of scenarios, all scenarios by default
+        :rtype: dict
+        """
+        if scenarios is None:
+            scenarios = [row[0] for row in self._db.execute("SELECT DISTINCT scenario FROM runs")]
+        result = dict()
+        for scenario in scenarios:
+            seconds = self.scenario_seconds(scenario)
+            if seconds is not None:
+                result[scenario] = seconds
+        return result
+
+    def predict(self, sm, scenario):
+        """
+        Expected run time of step manager tree before it is started. Steps are estimated by their
+        baselines, steps without history by their durations only. Dependencies between steps are
+        taken into account, so steps executed concurrently are not summed
+        """
+        samples = self._samples(scenario)[1]
+        baselines = dict((path, _median(values)) for path, values in samples.items())
+        return self._predict_sm(sm, baselines)
+
+    def _predict_sm(self, sm, baselines):
+        graph = StepGraph(sm._steps)
+        finish = dict()
+        for step in sm._steps:
+            start = max([finish[dependency] for dependency in graph.dependencies(step)] or [0.0])
+            finish[step] = start + self._predict_step(sm, step, baselines)
+        return max(finish.values()) if finish else 0.0
+
+    def _predict_step(self, sm, step, baselines):
+        """
+        Time from step start until next step can be started: step itself, its substeps and duration
+        """
+        seconds = baselines.get(_key(step.path))
+        if seconds is None:
+            seconds = 0.0
+            if isinstance(step, ParallelGroup):
+                seconds = max([self._predict_step(step, child, baselines) for child in step.children] or [0.0])
+        if step.sm is not None:
+            return seconds + self._predict_sm(step.sm, baselines) + step.duration
+        if getattr(sm, "_careful", False):
+            return max(seconds, step.duration)
+        return seconds + step.duration
+
+    def regressions(self, scenario, seconds, steps):
+        """
+        Compare run with baselines of previous runs
+
+        :param steps: pairs of step path and seconds
+        :rtype: list[TimingRegression]
+        """
+        runs, samples = self._samples(scenario)
+        if runs < self.min_runs:
+            return []
+        result = list()
+        baseline = self.scenario_seconds(scenario)
+        if self._regressed(seconds, baseline):
+            result.append(TimingRegression(scenario, (), seconds, baseline))
+        for path, step_seconds in steps:
+            values = samples.get(_key(path))
+            if values and self._regressed(step_seconds, _median(values)):
+                result.append(TimingRegression(scenario, tuple(path), step_seconds, _median(values)))
+        return result
+
+    def _regressed(self, seconds, baseline):
+        return seconds > baseline * self.threshold and seconds - baseline >= self.minimum
+
+    def record(self, scenario, seconds, steps, passed=True):
+        """
+        Store run of scenario. Only passed runs are used for baselines
+
+        :param steps: pairs of step path and seconds
+        :return: regressions of run compared with previous runs
+        :rtype: list[TimingRegression]
+        """
+        steps = [(tuple(path), step_seconds) for path, step_seconds in steps]
+        regressions = self.regressions(scenario, seconds, steps) if passed else []
+        with self._db:
+            run = self._db.execute("INSERT INTO runs (scenario, seconds, passed, created) VALUES (?, ?, ?, ?)",
+                                   (scenario, seconds, int(passed), time.time())).lastrowid
+            self._db.executemany("INSERT INTO steps (run, path, seconds) VALUES (?, ?, ?)",
+                                 [(run, _key(path), step_seconds) for path, step_seconds in steps])
+        return regressions
+
+    def record_sm(self, scenario, sm, seconds, passed=None):
+        """
+        Store run of finished step manager tree
+
+        :param passed: by default scenario passed if it is completed without warnings
+        """
+        if passed is None:
+            passed = sm.completed and not sm.has_warnings()
+        return self.record(scenario, seconds, step_timings(sm), passed)
@@ -0,0 +1,56 @@
+#
+
+from __future__ import absolute_import
+
+import heapq
+from concurrent.futures import wait
+from itertools import count
+
+
+class VirtualReactor(object):
+    """
+    Reactor with simulated clock. Delayed calls are executed in order of their time without
+    waiting, so `seconds` reports simulated time while scenario is finished as fast as possible
+
+    Useful for dry runs, mocks and validation of scenario structure.
+    """
+
+    def __init__(self):
+        self._queue = list()
+        self._counter = count()
+        self._now = 0.0
+        self._stopped = False
+
+    def seconds(self):
+        return self._now
+
+    def call_later(self, delay, callback):
+        heapq.heappush(self._queue, (self._now + max(delay, 0.0), next(self._counter), callback))
+
+    def call_when_done(self, future, callback):
+        """
+        Call callback once future is done, simulated clock is not advanced while waiting
+        """
+        self.call_later(0.0, lambda reactor: self._wait(future, callback))
+
+    def _wait(self, future, callback):
+        wait([future])
+        callback(self)
+
+    def stop(self):
+        self._stopped = True
+
+    def run(self, timeout=None):
+        """
+        Execute delayed calls until reactor is stopped, no calls left or simulated timeout is expired
+        """
+        self._stopped = False
+        deadline = None if timeout is None else self._now + timeout
+        while not self._stopped and len(self._queue) > 0:
+            when, _, callback = self._queue[0]
+            if deadline is not None and when > deadline:
+                self._now = deadline
+                break
+            heapq.heappop(self._queue)
+            self._now = when
+            callback(self)
@@ -2,4 +2,16 @@
 
 from __future__ import absolute_import
 
+from ._AsyncioReactor import AsyncioReactor
 from ._StepManager import StepManager
+from ._ScenarioRunner import ScenarioResult, ScenarioRunner
+from ._VirtualReactor import VirtualReactor
+from ._Hooks import StepHook, TimingCollector
+from ._Retry import DeadlineRetry, ExponentialRetry, FixedRetry, RetryPolicy
+from ._EventSource import EventSource
+from ._ScenarioFile import LazyCallable, dump_scenario, load_scenario
+from ._Reporter import JsonLinesReporter, StreamReporter, TextReporter
+from ._Deadline import Deadline, DeadlineRecord
+from ._Context import Context
+from ._ProcessRunner import CombinedResult, ProcessScenarioRunner, RemoteScenarioResult, ScenarioTask
+from ._TimingHistory import TimingHistory, TimingRegression
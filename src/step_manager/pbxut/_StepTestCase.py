@@ -17,6 +17,7 @@ class StepTestCase(PBXTestCase):
 
     CAREFUL = False
     TIMEOUT = 180
+    REPORT_FAILED_ONLY = False
 
     def assert_true_tuple(self, res_and_message):
         res = res_and_message[0]
@@ -25,8 +26,11 @@ class StepTestCase(PBXTestCase):
             raise AssertionError(message)
 
     def prepareReport(self, sm):
+        """
+        Render whole steps tree, only steps which are not passed with their parents if REPORT_FAILED_ONLY is set
+        """
         stream = StringIO()
-        sm.dump(stream=stream) # TODO - more color ...
+        sm.dump(stream=stream, failed_only=self.REPORT_FAILED_ONLY) # TODO - more color ...
         result = stream.getvalue()
         return result
 
@@ -51,9 +55,16 @@ class StepTestCase(PBXTestCase):
         raise NotImplementedError()
 
 
+    def createScenario(self):
+        """
+        Create step manager and fill it with steps of this test case
+        """
+        self.__sm__ = StepManager(careful=self.CAREFUL)
+        self.initialize(self.__sm__)
+        return self.__sm__
+
     def runTest(self):
-       self.__sm__ = StepManager(careful=self.CAREFUL)
-       self.initialize(self.__sm__)
+       self.createScenario()
        self.__sm__.run(timeout=self.TIMEOUT)
 
        self.alerts = self.__sm__.get_alerts()
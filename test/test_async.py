@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from step_manager import StepManager
+from step_manager._Step import State
+
+steps = ["Shinji", "Asuka", "Rei"]
+
+
+class TestRunAsync(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.sm = StepManager()
+
+    def test_run_async(self):
+        test_method = MagicMock(return_value=True)
+        for name in steps:
+            self.sm.add_step(name, action=test_method, pilot=name)
+
+        asyncio.run(self.sm.run_async(timeout=5))
+
+        self.assertTrue(self.sm.completed)
+        for name in steps:
+            test_method.assert_any_call(pilot=name)
+
+    def test_coroutine_action_and_expected(self):
+        calls = list()
+
+        async def action(pilot):
+            await asyncio.sleep(0.01)
+            calls.append(pilot)
+
+        async def check(pilot):
+            await asyncio.sleep(0.01)
+            return pilot in calls
+
+        for name in steps:
+            self.sm.add_step(name, action=action, pilot=name).add_expected(check, pilot=name)
+
+        asyncio.run(self.sm.run_async(timeout=5))
+
+        self.assertEqual(steps, calls)
+        self.assertFalse(self.sm.has_warnings())
+        self.assertEqual(State.PASS, self.sm.find_step(steps[-1]).state)
+
+    def test_attempts_and_substeps(self):
+        check = MagicMock(return_value=(False, "Not yet"))
+        action = MagicMock(return_value=True)
+        self.sm.add_step("Misato", interval=0.01, attempts=3).add_expected(check)
+        self.sm.add_substep("Misato", "Kaji", action=action)
+
+        asyncio.run(self.sm.run_async(timeout=5))
+
+        self.assertEqual(3, check.call_count)
+        action.assert_called_once_with()
+        self.assertEqual(["Misato: Not yet"], self.sm.collect_warnings())
+
+    def test_timeout(self):
+        self.sm.add_step("Gendo", duration=10)
+
+        with self.assertRaises(Exception):
+            asyncio.run(self.sm.run_async(timeout=0.05))
+
+    def test_action_exception(self):
+        async def action():
+            raise IndexError("not found")
+
+        self.sm.add_step("Kaworu", action=action)
+
+        with self.assertRaises(IndexError):
+            asyncio.run(self.sm.run_async(timeout=5))
+
+    def test_many_concurrent(self):
+        async def run_all(managers):
+            await asyncio.gather(*[sm.run_async(timeout=5) for sm in managers])
+
+        managers = list()
+        for i in range(100):
+            sm = StepManager()
+            sm.add_step("Wait", duration=0.1)
+            managers.append(sm)
+
+        loop = asyncio.new_event_loop()
+        start = loop.time()
+        loop.run_until_complete(run_all(managers))
+        took = loop.time() - start
+        loop.close()
+
+        self.assertTrue(all(sm.completed for sm in managers))
+        self.assertLess(took, 1.0)
+
+    def test_coroutine_action_requires_run_async(self):
+        async def action():
+            pass
+
+        self.sm.add_step("Kaworu", action=action)
+
+        with self.assertRaises(TypeError):
+            self.sm.find_step("Kaworu").run()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from step_manager import StepManager
+
+steps = ["Shinji", "Asuka", "Rei", "Kaworu"]
+
+
+class Crash(Exception):
+    pass
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "checkpoint.json")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def build(self, action, crash_on=None):
+        def run(pilot):
+            action(pilot)
+            if pilot == crash_on:
+                raise Crash(pilot)
+
+        sm = StepManager()
+        for name in steps:
+            sm.add_step(name, action=run, duration=1.0, pilot=name)
+        sm.add_substep("Asuka", "Unit-02", action=run, pilot="Unit-02")
+        sm.add_substep("Asuka", "Entry plug", action=run, pilot="Entry plug")
+        return sm
+
+    def test_resume_after_crash(self):
+        action = MagicMock()
+        sm = self.build(action, crash_on="Entry plug")
+        sm.set_checkpoint(self.path, interval=0)
+        sm.set("pilot", "Misato")
+        sm.set("unserializable", object())
+        sm.find_step("Asuka").get_substeps_manager().set("plug", "LCL")
+        sm.find_step("Shinji").register_warning("Get in the robot")
+        with self.assertRaises(Crash):
+            sm.run(virtual=True)
+
+        action = MagicMock()
+        sm = self.build(action)
+        sm.resume(self.path, virtual=True)
+
+        self.assertTrue(sm.completed)
+        self.assertEqual(["Entry plug", "Rei", "Kaworu"], [call[0][0] for call in action.call_args_list])
+        self.assertEqual("passed", sm.find_step("Shinji").state)
+        self.assertEqual(1.0, sm.find_step("Asuka").start_time)
+        self.assertEqual(["Shinji: Get in the robot"], sm.collect_warnings())
+        self.assertEqual("Misato", sm.get("pilot"))
+        self.assertIsNone(sm.get("unserializable"))
+        self.assertEqual("LCL", sm.find_step("Asuka").get_substeps_manager().get("plug"))
+        self.assertIsNone(sm.get("plug"))
+
+    def test_final_checkpoint(self):
+        sm = self.build(MagicMock())
+        sm.set_checkpoint(self.path, interval=3600)
+        sm.run(virtual=True)
+
+        with open(self.path) as stream:
+            data = json.load(stream)
+        self.assertTrue(data["completed"])
+        self.assertEqual(["Entry plug#0", "Unit-02#0"], sorted(data["steps"]["Asuka#0"]["substeps"]))
+
+        action = MagicMock()
+        sm = self.build(action)
+        sm.resume(self.path, virtual=True)
+        self.assertTrue(sm.completed)
+        action.assert_not_called()
+
+    def test_save_checkpoint_of_not_started(self):
+        sm = self.build(MagicMock())
+        sm.save_checkpoint(self.path)
+
+        action = MagicMock()
+        sm = self.build(action)
+        sm.resume(self.path, virtual=True)
+        self.assertEqual(6, action.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from step_manager import Context, StepManager
+
+
+class TestContext(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = Context()
+        self.child = Context(self.root)
+        self.grandchild = Context(self.child)
+
+    def test_child_sees_parent(self):
+        self.root.set("pilot", "Shinji")
+        self.assertEqual("Shinji", self.grandchild.get("pilot"))
+
+        self.root.set("pilot", "Asuka")
+        self.assertEqual("Asuka", self.grandchild.get("pilot"))
+
+    def test_writes_are_scoped(self):
+        self.root.set("pilot", "Shinji")
+        self.child.set("pilot", "Rei")
+
+        self.assertEqual("Shinji", self.root.get("pilot"))
+        self.assertEqual("Rei", self.grandchild.get("pilot"))
+        self.assertIsNone(self.root.get("unit"))
+        self.assertEqual(1, self.root.get("unit", 1))
+        self.assertNotIn("unit", self.child)
+
+    def test_lazy_value_is_evaluated_once(self):
+        factory = MagicMock(return_value="Misato")
+        self.root.set_lazy("captain", factory, rank="major")
+
+        factory.assert_not_called()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            values = list(pool.map(lambda _: self.grandchild.get("captain"), range(100)))
+
+        self.assertEqual(["Misato"] * 100, values)
+        factory.assert_called_once_with(rank="major")
+        self.assertEqual([("captain", "Misato")], self.root.items())
+
+    def test_concurrent_add_to_list(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: self.grandchild.add_to_list("angels", i), range(1000)))
+
+        self.assertEqual(list(range(1000)), sorted(self.grandchild.get("angels")))
+        self.assertIsNone(self.root.get("angels"))
+
+    def test_add_to_containers_of_parent(self):
+        self.root.add_to_list("pilots", "Shinji")
+        self.root.add_to_dict("units", "Unit-01", "Shinji")
+        self.child.add_to_list("pilots", "Asuka")
+        self.child.add_to_dict("units", "Unit-02", "Asuka")
+
+        self.assertEqual(["Shinji", "Asuka"], self.root.get("pilots"))
+        self.assertEqual({"Unit-01": "Shinji", "Unit-02": "Asuka"}, self.root.get("units"))
+
+    def test_set_parent(self):
+        self.root.set("pilot", "Shinji")
+        self.grandchild.get("pilot")
+        other = Context()
+        other.set("pilot", "Kaworu")
+        self.child.set_parent(other)
+
+        self.assertEqual("Kaworu", self.child.get("pilot"))
+
+
+class TestStepManagerContext(unittest.TestCase):
+    def test_substeps_see_parent_values(self):
+        sm = StepManager()
+        sm.set("pilot", "Shinji")
+        substeps = sm.add_step("Sortie").get_substeps_manager()
+        substeps.set("unit", "Unit-01")
+
+        self.assertEqual("Shinji", substeps.get("pilot"))
+        self.assertIsNone(sm.get("unit"))
+
+    def test_add_to_list_and_dict(self):
+        sm = StepManager()
+        sm.add_to_list("pilots", "Shinji")
+        sm.add_to_list("pilots", lambda: "Asuka")
+        sm.add_to_dict("units", "Unit-01", "Shinji")
+
+        self.assertEqual(["Shinji", "Asuka"], sm.get("pilots"))
+        self.assertEqual({"Unit-01": "Shinji"}, sm.get("units"))
+
+    def test_splice_relinks_context(self):
+        sm = StepManager()
+        sm.set("pilot", "Shinji")
+        other = StepManager()
+        other.set("pilot", "Kaworu")
+        substeps = other.add_step("Sortie").get_substeps_manager()
+        self.assertEqual("Kaworu", substeps.get("pilot"))
+
+        sm.splice_steps(other)
+
+        self.assertEqual("Shinji", substeps.get("pilot"))
+
+    def test_clone_context(self):
+        sm = StepManager()
+        sm.set("pilot", "Shinji")
+        sm.add_step("Sortie").add_substep("Entry plug")
+        clone = sm.clone()
+        clone.set("pilot", "Asuka")
+
+        self.assertEqual("Shinji", sm.find_step("Sortie").sm.get("pilot"))
+        self.assertEqual("Asuka", clone.find_step("Sortie").sm.get("pilot"))
+
+
+if __name__ == '__main__':
+    unittest.main()
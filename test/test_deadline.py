@@ -0,0 +1,84 @@
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock
+
+from step_manager import Deadline, StepManager, TimingCollector
+from step_manager._Step import State
+
+
+class TestDeadline(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sm = StepManager(unfinished_except=False)
+        self.never = MagicMock(return_value=(False, "Not yet"))
+        self.action = MagicMock()
+
+    def test_deadline_is_recorded(self):
+        self.sm.add_step("Asuka", attempts=10, interval=1, deadline=4.5).add_expected(self.never)
+        self.sm.run(virtual=True)
+
+        record = self.sm.get_deadline_records()[0]
+        self.assertEqual(("Asuka",), record.path)
+        self.assertEqual(5, record.attempts)
+        self.assertAlmostEqual(4.5, record.elapsed)
+        self.assertFalse(record.skipped)
+        self.assertEqual(10, self.sm.find_step("Asuka").attempts_used)
+        self.assertIn("Asuka: Deadline of 4.5 seconds exceeded after 5 attempts in 4.500 seconds",
+                      self.sm.collect_warnings())
+
+    def test_skip(self):
+        self.sm.add_step("Asuka", attempts=100, interval=1, deadline=Deadline(4.5, skip=True)).add_expected(self.never)
+        self.sm.add_step("Rei", action=self.action)
+        self.sm.run(virtual=True)
+
+        self.assertTrue(self.sm.completed)
+        self.action.assert_called_once_with()
+        self.assertEqual(5, self.never.call_count)
+        self.assertAlmostEqual(4.5, self.sm.find_step("Rei").start_time)
+        self.assertTrue(self.sm.get_deadline_records()[0].skipped)
+
+    def test_skipped_step_is_reported(self):
+        collector = self.sm.add_hook(TimingCollector())
+        self.sm.add_step("Asuka", attempts=100, interval=1, deadline=Deadline(4.5, skip=True)).add_expected(self.never)
+        self.sm.add_step("Rei", action=self.action)
+        self.sm.run(virtual=True)
+
+        step = self.sm.find_step("Asuka")
+        self.assertEqual(State.WARN, step.state)
+        self.assertAlmostEqual(4.5, step.stop_time)
+        self.assertEqual(["Asuka", "Rei"], [timing["name"] for timing in collector.get_timings()])
+        self.assertEqual(State.WARN, collector.get_timings()[0]["state"])
+        stream = StringIO()
+        self.sm.dump(stream=stream, failed_only=True)
+        self.assertIn("1. Asuka [{state}]".format(state=State.WARN), stream.getvalue())
+        self.assertNotIn("Rei", stream.getvalue())
+
+    def test_substeps_deadline(self):
+        self.sm.add_step("Asuka", deadline=Deadline(3, substeps=True, skip=True))
+        self.sm.add_substep("Asuka", "Unit-02", duration=5)
+        self.sm.add_substep("Asuka", "Entry plug", action=self.action)
+        self.sm.add_step("Rei", action=self.action)
+        self.sm.run(virtual=True)
+
+        self.action.assert_called_once_with()
+        self.assertEqual([("Asuka",)], [record.path for record in self.sm.get_deadline_records()])
+
+    def test_met_deadline(self):
+        self.sm.add_step("Asuka", duration=5, deadline=Deadline(3, skip=True))
+        self.sm.add_substep("Asuka", "Unit-02", duration=5, deadline=10)
+        self.sm.add_step("Rei", action=self.action)
+        self.sm.run(virtual=True)
+
+        self.action.assert_called_once_with()
+        self.assertEqual([], self.sm.get_deadline_records())
+        self.assertFalse(self.sm.has_warnings())
+
+    def test_timeout_message_has_step(self):
+        self.sm.add_step("Asuka")
+        self.sm.add_substep("Asuka", "Unit-02", attempts=100, interval=1).add_expected(self.never)
+        self.sm.run(timeout=5, virtual=True)
+
+        self.assertIn("StepManager finished because of timeout in step Asuka: Unit-02", self.sm.get_warnings())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import MagicMock
+
+from step_manager import EventSource, StepManager, TimingCollector
+from step_manager._Step import State
+
+
+class TestEventExpected(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.sm = StepManager()
+        self.source = EventSource()
+
+    def test_wake_up_on_event(self):
+        calls = list()
+
+        def send_event():
+            calls.append(True)
+            if len(calls) == 3:
+                self.source.notify(event="INVITE")
+                return True
+            return False
+
+        group = self.sm.add_parallel_group("Call")
+        waiter = group.add_step("Wait INVITE", interval=10, attempts=5)
+        waiter.add_expected_event(self.source, lambda event: event == "INVITE")
+        group.add_step("Send INVITE", interval=1.5, attempts=5).add_expected(send_event)
+        collector = self.sm.add_hook(TimingCollector())
+
+        self.sm.run(timeout=60, virtual=True)
+
+        self.assertEqual(State.PASS, waiter.state)
+        self.assertEqual(3, waiter.stop_time)
+        self.assertEqual(2, waiter.attempts_used)
+        # Waiter is woken by event before its interval is over
+        timings = dict((timing["path"], timing) for timing in collector.get_timings())
+        self.assertEqual(3, timings["Call/Wait INVITE"]["interval_wait"])
+
+    def test_event_from_action(self):
+        step = self.sm.add_step("Register", action=lambda: self.source.notify(event="REGISTER"))
+        step.add_expected_event(self.source)
+
+        self.sm.run(timeout=60, virtual=True)
+
+        self.assertEqual(State.PASS, step.state)
+        self.assertEqual(1, step.attempts_used)
+
+    def test_predicate_and_budget(self):
+        step = self.sm.add_step("Wait BYE", action=lambda: self.source.notify(event="CANCEL"), interval=2, attempts=3)
+        step.add_expected_event(self.source, lambda event: event == "BYE", message="No BYE")
+
+        self.sm.run(timeout=60, virtual=True)
+
+        self.assertEqual(State.WARN, step.state)
+        self.assertEqual(4, step.stop_time)
+        self.assertEqual(["Wait BYE: No BYE"], self.sm.collect_warnings())
+
+    def test_unsubscribe(self):
+        source = MagicMock()
+        self.sm.add_step("Hang up").add_expected_event(source)
+
+        self.sm.run(timeout=60, virtual=True)
+
+        source.subscribe.assert_called_once()
+        source.unsubscribe.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,8 @@ import logging
 import unittest
 
 from step_manager._Expected import Expected
-from unittest.mock import MagicMock, Mock
+from step_manager._ExpectedCache import ExpectedCache
+from unittest.mock import MagicMock, Mock, patch
 
 test_name = "Forrest"
 test_value = "Gump"
@@ -66,6 +67,45 @@ class TestExpected(unittest.TestCase):
         expected = Expected(self.owner, test_method, name=test_name, value=test_value, is_alert=True)
         self.assertTrue(expected.is_alert)
 
+    def test_cached_result(self):
+        self.owner.get_expected_cache = MagicMock(return_value=ExpectedCache())
+        test_method = MagicMock(return_value=(False, "Busy"))
+        first = Expected(self.owner, test_method, cache_ttl=10, name=test_name)
+        second = Expected(self.owner, test_method, cache_ttl=10, should_return=False, name=test_name)
+
+        self.assertEqual((False, "Busy"), first.run(now=0))
+        self.assertEqual((True, ""), second.run(now=5))
+        test_method.assert_called_once_with(name=test_name)
+
+        first.run(now=10)
+        self.assertEqual(2, test_method.call_count)
+
+    @patch("step_manager._ExpectedCache.time.monotonic")
+    def test_cached_result_without_reactor_time(self, monotonic):
+        self.owner.get_expected_cache = MagicMock(return_value=ExpectedCache())
+        test_method = MagicMock(return_value=True)
+        expected = Expected(self.owner, test_method, cache_ttl=10, name=test_name)
+
+        monotonic.return_value = 100
+        expected.run()
+        monotonic.return_value = 105
+        expected.run()
+        self.assertEqual(1, test_method.call_count)
+
+        monotonic.return_value = 110
+        expected.run()
+        self.assertEqual(2, test_method.call_count)
+
+    def test_unhashable_kwargs_are_not_cached(self):
+        self.owner.get_expected_cache = MagicMock(return_value=ExpectedCache())
+        test_method = MagicMock(return_value=True)
+        expected = Expected(self.owner, test_method, cache_ttl=10, value=[test_value])
+
+        expected.run(now=0)
+        expected.run(now=1)
+
+        self.assertEqual(2, test_method.call_count)
+
 
 if __name__ == '__main__':
     unittest.main()
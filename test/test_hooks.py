@@ -0,0 +1,60 @@
+import csv
+import json
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock
+
+from step_manager import StepHook, StepManager, TimingCollector
+
+
+class TestTimingCollector(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.sm = StepManager()
+        self.collector = self.sm.add_hook(TimingCollector())
+        self.check = MagicMock(side_effect=[False, False, True])
+        self.sm.add_step("Misato", duration=60)
+        self.sm.add_step("Ritsuko", interval=10, attempts=5, duration=5).add_expected(self.check)
+        self.sm.add_substep("Ritsuko", "Maya", action=MagicMock(return_value=True))
+
+    def test_timings(self):
+        self.sm.run(timeout=3600, virtual=True)
+        timings = dict((timing["path"], timing) for timing in self.collector.get_timings())
+
+        self.assertEqual(["Misato", "Ritsuko", "Ritsuko/Maya"], list(timings))
+        ritsuko = timings["Ritsuko"]
+        self.assertEqual(3, ritsuko["attempts"])
+        self.assertEqual(60, ritsuko["start"])
+        self.assertEqual(20, ritsuko["seconds"])
+        self.assertEqual(20, ritsuko["interval_wait"])
+        self.assertEqual(5, ritsuko["duration_wait"])
+        self.assertEqual([60, 70, 80], [attempt["start"] for attempt in ritsuko["attempt_timings"]])
+        self.assertEqual(60, timings["Misato"]["duration_wait"])
+        self.assertEqual("passed", timings["Ritsuko/Maya"]["state"])
+
+    def test_export(self):
+        self.sm.run(timeout=3600, virtual=True)
+
+        stream = StringIO()
+        self.collector.to_json(stream)
+        self.assertEqual(3, len(json.loads(stream.getvalue())))
+
+        stream = StringIO()
+        self.collector.to_csv(stream)
+        rows = list(csv.DictReader(StringIO(stream.getvalue())))
+        self.assertEqual(5, len(rows))
+        self.assertEqual(["1", "1", "2", "3", "1"], [row["attempt"] for row in rows])
+
+    def test_custom_hook(self):
+        hook = StepHook()
+        hook.on_expected = MagicMock()
+        self.sm.add_hook(hook)
+
+        self.sm.run(timeout=3600, virtual=True)
+
+        self.assertEqual(3, hook.on_expected.call_count)
+        self.assertEqual([False, False, True], [call[0][2] for call in hook.on_expected.call_args_list])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock
+
+from step_manager import StepManager
+from step_manager._Step import State
+
+pilots = ["Shinji", "Asuka", "Rei", "Mari", "Toji"]
+
+
+class TestParallelGroup(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.sm = StepManager()
+        self.sm.add_step("Before")
+        self.group = self.sm.add_parallel_group("Launch")
+        self.sm.add_step("After")
+
+    def test_children_run_concurrently(self):
+        check = MagicMock(return_value=False)
+        for name in pilots:
+            self.group.add_step(name, interval=0.05, attempts=3).add_expected(check)
+
+        self.sm.run(timeout=5)
+
+        self.assertTrue(self.sm.completed)
+        self.assertEqual(len(pilots) * 3, check.call_count)
+        self.assertLess(self.group.seconds, 0.05 * 2 * len(pilots))
+        self.assertEqual(State.WARN, self.group.state)
+        self.assertEqual(len(pilots), len(self.sm.collect_warnings()))
+
+    def test_all_children_passed(self):
+        action = MagicMock(return_value=True)
+        for name in pilots:
+            self.group.add_step(name, action=action, pilot=name)
+
+        self.sm.run(timeout=5)
+
+        for name in pilots:
+            action.assert_any_call(pilot=name)
+        self.assertEqual(State.PASS, self.group.state)
+        self.assertTrue(self.sm.find_step("After").start_info_provided)
+
+    def test_fail_fast(self):
+        group = self.sm.add_parallel_group("Sortie", fail_fast=True)
+        slow_check = MagicMock(return_value=False)
+        group.add_step("Unit-00", interval=0.05, attempts=100).add_expected(slow_check)
+        group.add_step("Unit-01").add_expected(MagicMock(return_value=(False, "Berserk")))
+
+        self.sm.run(timeout=5)
+
+        self.assertTrue(self.sm.completed)
+        self.assertEqual(State.WARN, group.state)
+        self.assertTrue(group.find_step("Unit-00").cancelled)
+        self.assertLess(slow_check.call_count, 10)
+        self.assertEqual(["Sortie: Unit-01: Berserk"], self.sm.collect_warnings())
+
+    def test_child_substeps(self):
+        action = MagicMock(return_value=True)
+        child = self.group.add_step("Unit-02")
+        child.add_substep("Entry plug", action=action)
+
+        self.sm.run(timeout=5)
+
+        action.assert_called_once_with()
+        self.assertTrue(self.sm.completed)
+
+    def test_dump_children(self):
+        self.group.add_step("Unit-01")
+        stream = StringIO()
+        self.sm.dump(stream=stream)
+
+        self.assertIn("2.1. Unit-01", stream.getvalue())
+
+    def test_child_dependencies_rejected(self):
+        self.group.add_step("Unit-00")
+        with self.assertRaises(ValueError):
+            self.group.add_step("Unit-01", depends_on=["Unit-00"])
+        self.assertEqual(1, len(self.group.children))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import io
+import json
+import os
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from step_manager import ProcessScenarioRunner, StepManager, TimingHistory
+
+
+def passing():
+    sm = StepManager()
+    sm.add_step("Shinji", duration=1)
+    sm.add_step("Asuka").add_substep("Unit-02")
+    return sm
+
+
+def failing():
+    sm = StepManager()
+    sm.add_step("Rei").add_expected(lambda: (False, "Lost"))
+    return sm
+
+
+def crashing():
+    sm = StepManager()
+    sm.add_step("Kaworu", action=lambda: os._exit(3))
+    return sm
+
+
+def blocking():
+    sm = StepManager()
+    sm.add_step("Gendo", action=lambda: time.sleep(60))
+    return sm
+
+
+def broken():
+    raise ValueError("No scenario")
+
+
+class TestProcessScenarioRunner(unittest.TestCase):
+    def setUp(self) -> None:
+        self.runner = ProcessScenarioRunner(workers=2, virtual=True)
+
+    def test_run(self):
+        self.runner.add_factory("test.test_process_runner:passing", name="passing")
+        self.runner.add_factory("test.test_process_runner:failing", name="failing")
+        self.runner.add_factory("test.test_process_runner:broken", name="broken")
+        on_step = MagicMock()
+
+        combined = self.runner.run(on_step=on_step)
+
+        self.assertEqual(["passing", "failing", "broken"], [result.name for result in combined.results])
+        passing_result, failing_result, broken_result = combined.results
+        self.assertTrue(passing_result.passed)
+        self.assertEqual([["Shinji"], ["Asuka"], ["Asuka", "Unit-02"]],
+                         [step["path"] for step in passing_result.steps])
+        self.assertEqual(["Rei: Lost"], failing_result.warnings)
+        self.assertIn("No scenario", broken_result.error)
+        self.assertFalse(combined.passed)
+        self.assertEqual(4, on_step.call_count)
+        self.assertEqual({"passing", "failing"}, set(self.runner.durations))
+
+        stream = io.StringIO()
+        combined.to_json(stream)
+        self.assertEqual(3, len(json.loads(stream.getvalue())["results"]))
+
+    def test_crashed_worker(self):
+        self.runner.add_factory("test.test_process_runner:crashing", name="crashing")
+        self.runner.add_factory("test.test_process_runner:passing", name="passing")
+
+        combined = self.runner.run()
+
+        self.assertIn("exited with code 3", combined.results[0].error)
+        self.assertTrue(combined.results[1].passed)
+
+    def test_blocked_worker(self):
+        runner = ProcessScenarioRunner(workers=1, timeout=1, virtual=True, grace=1)
+        runner.add_factory("test.test_process_runner:blocking", name="blocking")
+        runner.add_factory("test.test_process_runner:passing", name="passing")
+
+        combined = runner.run()
+
+        self.assertIn("terminated", combined.results[0].error)
+        self.assertTrue(combined.results[1].passed)
+
+    def test_duplicate_name(self):
+        self.runner.add_factory("test.test_process_runner:passing", name="passing")
+        with self.assertRaises(ValueError):
+            self.runner.add_factory("test.test_process_runner:failing", name="passing")
+
+    def test_longest_first(self):
+        self.runner.durations = {"short": 1.0, "long": 10.0}
+        for name in ["short", "unknown", "long"]:
+            self.runner.add_factory("test.test_process_runner:passing", name=name)
+
+        self.assertEqual(["long", "unknown", "short"], [task.name for task in self.runner.order()])
+
+    def test_history(self):
+        history = TimingHistory()
+        self.addCleanup(history.close)
+        history.record("failing", 10.0, [])
+        history.record("passing", 1.0, [])
+        self.runner.history = history
+        self.runner.add_factory("test.test_process_runner:passing", name="passing")
+        self.runner.add_factory("test.test_process_runner:failing", name="failing")
+
+        self.assertEqual(["failing", "passing"], [task.name for task in self.runner.order()])
+        self.runner.run()
+        self.assertEqual(0, history.step_seconds("passing", ("Asuka", "Unit-02")))
+        self.assertEqual(10.0, history.scenario_seconds("failing"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import json
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock
+
+from step_manager import JsonLinesReporter, StepManager, TextReporter
+
+
+class TestReporter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sm = StepManager(unfinished_except=False)
+        self.sm.add_step("Shinji")
+        self.sm.add_step("Asuka").add_substep("Unit-02").add_expected(MagicMock(return_value=(False, "Lost")))
+        self.sm.add_substep("Asuka", "Entry plug")
+        group = self.sm.add_parallel_group("Together")
+        group.add_step("Rei")
+
+    def test_text_reporter_matches_dump(self):
+        stream = StringIO()
+        self.sm.add_hook(TextReporter(stream))
+        self.sm.run(virtual=True)
+
+        dumped = StringIO()
+        self.sm.dump(stream=dumped)
+        self.assertEqual(sorted(dumped.getvalue().splitlines()), sorted(stream.getvalue().splitlines()))
+        self.assertIn(".. 2.2. Entry plug [passed]", stream.getvalue())
+
+    def test_json_lines_reporter(self):
+        stream = StringIO()
+        self.sm.add_hook(JsonLinesReporter(stream))
+        self.sm.run(virtual=True)
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(6, len(records))
+        unit = [record for record in records if record["path"] == ["Asuka", "Unit-02"]][0]
+        self.assertEqual("2.1", unit["number"])
+        self.assertEqual("warned", unit["state"])
+        self.assertEqual(["Unit-02: Lost"], unit["warnings"])
+        self.assertEqual("3.1", records[-2]["number"])
+
+    def test_dump_failed_only(self):
+        self.sm.run(virtual=True)
+        stream = StringIO()
+        self.sm.dump(stream=stream, failed_only=True)
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(2, len(lines))
+        self.assertIn("2. Asuka [passed]", lines[0])
+        self.assertIn(".. 2.1. Unit-02 [warned]", lines[1])
+
+    def test_dump_base_order(self):
+        stream = StringIO()
+        self.sm.find_step("Asuka").sm.dump(level=1, base_order=["2"], stream=stream)
+
+        self.assertTrue(stream.getvalue().startswith(".. 2.1. Unit-02 [unknown] (action=None expecteds=[<"))
+
+
+if __name__ == '__main__':
+    unittest.main()
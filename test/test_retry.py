@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import MagicMock
+
+from step_manager import DeadlineRetry, ExponentialRetry, FixedRetry, StepHook, StepManager
+
+
+class AttemptTimes(StepHook):
+
+    def __init__(self):
+        self.times = list()
+
+    def on_attempt_start(self, step, attempt, time):
+        self.times.append(time)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_fixed(self):
+        policy = FixedRetry(interval=5, attempts=3)
+        self.assertEqual(5, policy.delay(1))
+        self.assertFalse(policy.is_last(2, 0))
+        self.assertTrue(policy.is_last(3, 0))
+
+    def test_exponential(self):
+        policy = ExponentialRetry(initial=1, factor=2, max_interval=6, attempts=10)
+        self.assertEqual([1, 2, 4, 6], [policy.delay(attempt) for attempt in range(1, 5)])
+
+    def test_exponential_jitter(self):
+        policy = ExponentialRetry(initial=8, jitter=0.5, attempts=10)
+        for attempt in range(1, 5):
+            delay = policy.delay(attempt)
+            self.assertLessEqual(delay, policy.interval(attempt))
+            self.assertGreaterEqual(delay, policy.interval(attempt) / 2)
+
+    def test_deadline(self):
+        policy = DeadlineRetry(deadline=10, interval=3)
+        self.assertFalse(policy.is_last(100, 6))
+        self.assertTrue(policy.is_last(1, 8))
+
+    def test_unlimited_policy(self):
+        with self.assertRaises(ValueError):
+            FixedRetry(interval=1)
+
+    def test_zero_interval(self):
+        for create in [lambda: DeadlineRetry(deadline=5, interval=0),
+                       lambda: FixedRetry(interval=-1, attempts=3),
+                       lambda: ExponentialRetry(initial=0, deadline=5),
+                       lambda: ExponentialRetry(initial=1, factor=0.5, deadline=5)]:
+            with self.assertRaises(ValueError):
+                create()
+        # Zero interval is allowed when amount of attempts is limited
+        self.assertEqual(0, FixedRetry(interval=0, attempts=3).delay(1))
+
+
+class TestStepRetry(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.sm = StepManager()
+        self.hook = self.sm.add_hook(AttemptTimes())
+
+    def test_passed_expected_is_not_repeated(self):
+        passed = MagicMock(return_value=True)
+        flaky = MagicMock(side_effect=[False, False, True])
+        self.sm.add_step("Shinji", interval=1, attempts=3).add_expected(passed).add_expected(flaky)
+
+        self.sm.run(timeout=60, virtual=True)
+
+        self.assertEqual(1, passed.call_count)
+        self.assertEqual(3, flaky.call_count)
+        self.assertFalse(self.sm.has_warnings())
+
+    def test_exponential_step(self):
+        check = MagicMock(return_value=False)
+        self.sm.add_step("Asuka", retry=ExponentialRetry(initial=1, attempts=4)).add_expected(check)
+
+        self.sm.run(timeout=60, virtual=True)
+
+        self.assertEqual([0, 1, 3, 7], self.hook.times)
+        self.assertTrue(self.sm.has_warnings())
+
+    def test_deadline_step(self):
+        check = MagicMock(return_value=False)
+        self.sm.add_step("Rei", retry=DeadlineRetry(deadline=10, interval=3)).add_expected(check)
+
+        self.sm.run(timeout=60, virtual=True)
+
+        self.assertEqual([0, 3, 6, 9], self.hook.times)
+        self.assertEqual(1, len(self.sm.collect_warnings()))
+
+    def test_expected_policy(self):
+        fast = MagicMock(side_effect=[False, False, False, True])
+        slow = MagicMock(return_value=False)
+        step = self.sm.add_step("Misato")
+        step.add_expected(fast, retry=FixedRetry(interval=1, attempts=5))
+        step.add_expected(slow, retry=FixedRetry(interval=5, attempts=2))
+
+        self.sm.run(timeout=60, virtual=True)
+
+        self.assertEqual(4, fast.call_count)
+        self.assertEqual(2, slow.call_count)
+        self.assertEqual([0, 1, 2, 3, 5], self.hook.times)
+        self.assertEqual(1, len(self.sm.collect_warnings()))
+
+
+if __name__ == '__main__':
+    unittest.main()
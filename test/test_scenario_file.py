@@ -0,0 +1,103 @@
+import io
+import unittest
+from unittest.mock import MagicMock
+
+from step_manager import Deadline, ExponentialRetry, LazyCallable, StepManager, dump_scenario, load_scenario
+
+calls = list()
+
+
+def action(**kwargs):
+    calls.append(("action", kwargs))
+
+
+def check(**kwargs):
+    calls.append(("check", kwargs))
+    return True
+
+
+class TestScenarioFile(unittest.TestCase):
+    def setUp(self) -> None:
+        del calls[:]
+        self.sm = StepManager()
+        self.sm.add_step("Login", action=action, duration=1.5, user="Shinji").add_expected(check, cache_ttl=5,
+                                                                                         user="Shinji")
+        step = self.sm.add_step("Poll", attempts=3, interval=2, retry=ExponentialRetry(1, max_interval=8, attempts=5),
+                                deadline=Deadline(60, skip=True))
+        step.add_expected(check, should_return=True, is_alert=True, executor="thread")
+        step.add_substep("Unit-01", action=action).add_substep("Entry plug", action=action)
+        group = self.sm.add_parallel_group("Together", fail_fast=True)
+        group.add_step("Asuka", action=action, pilot="Asuka")
+        group.add_step("Rei", action=action, pilot="Rei")
+
+    def roundtrip(self, indent=None):
+        stream = io.StringIO()
+        dump_scenario(self.sm, stream, indent=indent)
+        stream.seek(0)
+        return load_scenario(stream)
+
+    def test_roundtrip(self):
+        stream = io.StringIO()
+        dump_scenario(self.sm, stream, indent=1)
+        stream.seek(0)
+        text = stream.getvalue()
+
+        loaded = load_scenario(stream)
+        stream = io.StringIO()
+        dump_scenario(loaded, stream, indent=1)
+
+        self.assertEqual(text, stream.getvalue())
+        self.assertIn('"method": "test.test_scenario_file:check"', text)
+
+    def test_loaded_tree(self):
+        loaded = self.roundtrip()
+
+        login = loaded.find_step("Login")
+        self.assertEqual(1.5, login.duration)
+        self.assertEqual(LazyCallable("test.test_scenario_file:action"), login.action)
+        self.assertEqual(5, login._expected[0]._cache_ttl)
+        poll = loaded.find_step("Poll")
+        self.assertEqual(8, poll._retry.max_interval)
+        self.assertTrue(poll.deadline.skip)
+        self.assertTrue(poll._expected[0].is_alert)
+        self.assertEqual(("Poll", "Unit-01", "Entry plug"),
+                         poll.sm.find_step("Unit-01").sm.find_step("Entry plug").path)
+        group = loaded.find_step("Together")
+        self.assertTrue(group.fail_fast)
+        self.assertEqual(["Asuka", "Rei"], [child.name for child in group.children])
+        self.assertEqual([], calls)
+
+    def test_run_loaded(self):
+        loaded = self.roundtrip()
+        loaded.run(virtual=True)
+
+        self.assertTrue(loaded.completed)
+        self.assertFalse(loaded.has_warnings())
+        self.assertIn(("action", {"user": "Shinji"}), calls)
+        self.assertIn(("check", {"user": "Shinji"}), calls)
+        self.assertIn(("action", {"pilot": "Rei"}), calls)
+
+    def test_lambda_is_not_serialized(self):
+        self.sm.add_step("Lambda", action=lambda: None)
+        with self.assertRaises(ValueError):
+            dump_scenario(self.sm, io.StringIO())
+
+    def test_unserializable_kwargs(self):
+        self.sm.add_step("Sync", action=action, user=object())
+        with self.assertRaisesRegex(ValueError, "step Sync"):
+            dump_scenario(self.sm, io.StringIO())
+
+    def test_unknown_version(self):
+        with self.assertRaises(ValueError):
+            load_scenario(io.StringIO('{"version": 0, "steps": []}'))
+
+    def test_lazy_callable(self):
+        func = LazyCallable("test.test_scenario_file:check")
+        self.assertTrue(func(user="Misato"))
+        self.assertEqual(hash(LazyCallable("test.test_scenario_file:check")), hash(func))
+        self.assertIs(check, func.resolve())
+        self.assertIs(MagicMock, LazyCallable("unittest.mock.MagicMock").resolve())
+
+
+if __name__ == '__main__':
+    unittest.main()
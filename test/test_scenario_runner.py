@@ -0,0 +1,78 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from step_manager import ScenarioRunner, StepManager
+
+
+def make_scenario(duration=0.1, action=None):
+    sm = StepManager()
+    sm.add_step("Wait", action=action, duration=duration)
+    sm.add_step("Done")
+    return sm
+
+
+class TestScenarioRunner(unittest.TestCase):
+
+    def test_scenarios_share_reactor(self):
+        runner = ScenarioRunner()
+        for i in range(30):
+            runner.add(make_scenario(duration=0.2))
+
+        start = time.time()
+        results = runner.run()
+        took = time.time() - start
+
+        self.assertEqual(30, len(results))
+        self.assertTrue(all(result.passed for result in results))
+        self.assertLess(took, 0.2 * 5)
+
+    def test_concurrency(self):
+        runner = ScenarioRunner(concurrency=2)
+        for i in range(4):
+            runner.add(make_scenario(duration=0.1), name="Unit-0{}".format(i))
+
+        start = time.time()
+        results = runner.run()
+        took = time.time() - start
+
+        self.assertEqual(["Unit-00", "Unit-01", "Unit-02", "Unit-03"], [result.name for result in results])
+        self.assertGreaterEqual(took, 0.2)
+        self.assertTrue(all(result.completed for result in results))
+
+    def test_scenario_timeout(self):
+        runner = ScenarioRunner(timeout=5)
+        slow = runner.add(make_scenario(duration=10), timeout=0.1)
+        fast = runner.add(make_scenario(duration=0.0))
+
+        runner.run()
+
+        self.assertTrue(slow.timed_out)
+        self.assertFalse(slow.passed)
+        self.assertIn("timeout", slow.sm.get_warnings())
+        self.assertTrue(fast.passed)
+
+    def test_scenario_error_is_isolated(self):
+        runner = ScenarioRunner()
+        broken = runner.add(make_scenario(action=MagicMock(side_effect=IndexError("not found"))))
+        healthy = runner.add(make_scenario())
+
+        runner.run()
+
+        self.assertIsInstance(broken.error, IndexError)
+        self.assertFalse(broken.passed)
+        self.assertTrue(healthy.passed)
+
+    def test_run_async(self):
+        runner = ScenarioRunner(concurrency=10)
+        for i in range(20):
+            runner.add(make_scenario(duration=0.1))
+
+        results = asyncio.run(runner.run_async())
+
+        self.assertTrue(all(result.passed for result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import logging
+import threading
 import unittest
 from unittest.mock import MagicMock, Mock
 
@@ -138,6 +140,99 @@ class TestSm(unittest.TestCase):
 
         self.assertEqual(step_index_original + 1, step_index)
 
+    def test_find_duplicates_after_inserts(self):
+        name = "Pen-Pen"
+        last = self.sm.add_step(name)
+        first = self.sm.add_step_before(steps[0], name)
+        middle = self.sm.add_step_after(steps[3], name)
+
+        self.assertEqual([first, middle, last], self.sm.find_steps(name))
+        self.assertEqual(0, self.sm.find_step_index(name))
+        self.assertEqual(len(steps) + 2, self.sm.find_last_step_index(name))
+
+    def test_index_after_remove(self):
+        self.sm.remove_step(steps[2])
+        self.sm.remove_step_from_bottom(steps[-1])
+        self.sm.remove_steps_between(steps[4], steps[5])
+
+        self.assertEqual(-1, self.sm.find_step_index(steps[2]))
+        self.assertEqual(-1, self.sm.find_step_index(steps[5]))
+        self.assertEqual(2, self.sm.find_step_index(steps[3]))
+        self.assertEqual(3, self.sm.find_step_index(steps[6]))
+
+    def test_remove_range(self):
+        removed = self.sm.remove_range(steps[2], steps[4])
+
+        self.assertEqual(steps[2:5], [step.name for step in removed])
+        self.assertEqual(2, self.sm.find_step_index(steps[5]))
+
+    def test_splice_steps(self):
+        other = StepManager()
+        names = ["Maya", "Makoto", "Shigeru"]
+        for name in names:
+            other.add_step(name)
+
+        self.sm.splice_steps(other, after_step=steps[0])
+
+        for i, name in enumerate(names):
+            self.assertEqual(i + 1, self.sm.find_step_index(name))
+        self.assertEqual(4, self.sm.find_step_index(steps[1]))
+        with self.assertRaises(Exception):
+            other.find_step(names[0])
+
+    def test_clone(self):
+        check = MagicMock(return_value=True)
+        self.sm.find_step(steps[0]).add_expected(check)
+        self.sm.add_substep(steps[1], "Unit-01")
+
+        clone = self.sm.clone()
+        clone.add_step_after(steps[0], "Maya")
+        clone.remove_step(steps[2])
+        clone.find_step(steps[0]).add_expected(check)
+        clone.add_substep(steps[1], "Unit-02")
+
+        self.assertEqual(-1, self.sm.find_step_index("Maya"))
+        self.assertEqual(2, self.sm.find_step_index(steps[2]))
+        self.assertEqual(1, len(self.sm.find_step(steps[0])._expected))
+        self.assertEqual(-1, self.sm.find_step(steps[1]).sm.find_step_index("Unit-02"))
+        self.assertEqual(1, clone.find_step_index("Maya"))
+        self.assertEqual(-1, clone.find_step_index(steps[2]))
+        self.assertEqual(2, len(clone.find_step(steps[0])._expected))
+        self.assertEqual((steps[1], "Unit-01"), clone.find_step(steps[1]).sm.find_step("Unit-01").path)
+
+    def test_run_clone(self):
+        check = MagicMock(return_value=True)
+        self.sm.find_step(steps[0]).add_expected(check)
+        clone = self.sm.clone()
+
+        clone.run(virtual=True)
+
+        self.assertTrue(clone.completed)
+        self.assertFalse(self.sm.completed)
+        self.assertEqual(1, check.call_count)
+        self.assertEqual("unknown", self.sm.find_step(steps[0]).state)
+        self.assertIs(clone.find_step(steps[0]), clone.find_step(steps[0])._expected[0].owner)
+        self.assertIs(self.sm.find_step(steps[0]), self.sm.find_step(steps[0])._expected[0].owner)
+
+    def test_update_backlog(self):
+        self.sm.start(Mock())
+        self.sm.add_step_after(steps[0], "Maya")
+        self.sm.update_backlog()
+        self.sm.update_backlog()
+
+        self.assertEqual(len(steps) + 1, len(self.sm._backlog))
+        self.assertEqual("Maya", self.sm._backlog[-1].name)
+
+    def test_continue_execution_skips_started_steps(self):
+        test_method = MagicMock(return_value=True)
+        self.sm.add_step("Maya", action=test_method)
+        self.sm.run()
+        self.sm.add_step_before("Maya", "Makoto", action=test_method)
+        self.sm.continue_execution()
+
+        self.assertEqual(2, test_method.call_count)
+        self.assertTrue(self.sm.find_step("Makoto").start_info_provided)
+
     def test_run(self):
         test_method = MagicMock(return_value=True)
         values = {"piter": "pan", "king": "kong", "hannibal": "lector"}
@@ -148,6 +243,34 @@ class TestSm(unittest.TestCase):
         for k, v in values.items():
             test_method.assert_any_call(**{k: v})
 
+    def test_run_in_executor(self):
+        threads = list()
+
+        def action():
+            threads.append(threading.current_thread())
+
+        def check():
+            threads.append(threading.current_thread())
+            return True
+
+        self.sm.add_step("Maya", action=action, executor="thread").add_expected(check, executor="thread")
+        self.sm.run()
+
+        self.assertTrue(self.sm.completed)
+        self.assertEqual(2, len(threads))
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_cached_expected(self):
+        check = MagicMock(return_value=True)
+        for name in steps:
+            self.sm.find_step(name).add_expected(check, cache_ttl=10, user="Misato")
+        self.sm.add_step("Logout", action=lambda: self.sm.invalidate_expected(check, user="Misato"))
+        self.sm.add_step("Check again").add_expected(check, cache_ttl=10, user="Misato")
+
+        self.sm.run(virtual=True)
+
+        self.assertEqual(2, check.call_count)
+
     def test_collect_warning(self):
         message = "The thread of human hope is spun with the flax of sorrow."
         count = 10
@@ -178,6 +301,30 @@ class TestSm(unittest.TestCase):
 
         self.assertEqual(count, len(alerts))
 
+    def test_nested_warnings(self):
+        message = "Sorry, Misato"
+        substep = self.sm.add_substep(steps[0], "Unit-01")
+        subsubstep = substep.add_substep("Entry plug")
+
+        subsubstep.register_warning(message)
+
+        self.assertEqual(["{}: Unit-01: Entry plug: {}".format(steps[0], message)], self.sm.collect_warnings())
+        self.assertEqual(["Unit-01: Entry plug: {}".format(message)], substep.collect_warnings())
+        self.assertEqual(["Entry plug: {}".format(message)], substep.sm.collect_warnings())
+        record = self.sm.get_warning_records()[0]
+        self.assertEqual((steps[0], "Unit-01", "Entry plug"), record.path)
+        self.assertEqual(message, record.message)
+
+    def test_warnings_are_not_stale(self):
+        self.sm.find_step(steps[0]).register_warning("first")
+        self.assertEqual(1, len(self.sm.collect_warnings()))
+
+        self.sm.find_step(steps[1]).register_alert("second")
+        self.sm.find_step(steps[1]).register_warning("third")
+
+        self.assertEqual(2, len(self.sm.collect_warnings()))
+        self.assertTrue(self.sm.has_alerts())
+
     def test_get_warnings(self):
         message = "The thread of human hope is spun with the flax of sorrow."
         test_method = MagicMock(return_value=(False, message))
@@ -192,6 +339,23 @@ class TestSm(unittest.TestCase):
         self.sm.run()
         self.assertTrue(message in self.sm.get_alerts())
 
+    def test_log_formatting_is_deferred(self):
+        argument = MagicMock()
+        argument.__format__ = MagicMock(return_value="Unit-01")
+        logger = logging.getLogger("step_manager")
+        level = logger.level
+        self.addCleanup(logger.setLevel, level)
+
+        logger.setLevel(logging.WARNING)
+        self.sm.log(logging.INFO, "Launch {unit}", unit=argument)
+        argument.__format__.assert_not_called()
+        argument.__str__.assert_not_called()
+
+        with self.assertLogs(logger, logging.INFO) as logs:
+            self.sm.log(logging.INFO, "Launch {unit}", unit=argument)
+        argument.__format__.assert_called_once_with("")
+        self.assertIn("Launch Unit-01", logs.output[0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from unittest.mock import MagicMock, Mock
 
@@ -85,6 +86,19 @@ class TestStep(unittest.TestCase):
         warning = self.step.collect_warnings()
         self.assertIn("{}: {}".format(self.name, message), warning)
 
+    def test_warnings_are_read_only(self):
+        message = "Get in the robot."
+        self.step.register_warning(message)
+        self.step.register_alert(message)
+
+        self.assertEqual(("{}: {}".format(self.name, message),), self.step.warnings)
+        self.assertEqual(("{}: {}".format(self.name, message),), self.step.alerts)
+        # Snapshots can't be changed, so old code mutating them fails instead of doing nothing
+        with self.assertRaises(AttributeError):
+            self.step.warnings.append("Ignored")
+        with self.assertRaises(AttributeError):
+            self.step.alerts = list()
+
     def test_register_alerts(self):
         message = "The fact that you have a place where you can return home, will lead you to happiness."
         self.step.register_alert(message)
@@ -101,6 +115,51 @@ class TestStep(unittest.TestCase):
         test_method.assert_called_with(key=first)
         self.assertTrue(step.repeat)
 
+    def test_run_action_in_executor(self):
+        pool = ThreadPoolExecutor(max_workers=1)
+        self.owner.get_executor = MagicMock(return_value=pool)
+        expected_method = MagicMock(return_value=True)
+        step = Step(self.owner, self.name, self.test_method, executor="thread", key="Unit-01")
+        step.add_expected(expected_method, executor="thread")
+
+        step.run()
+        while step.pending is not None:
+            wait([step.pending])
+            step.run()
+        pool.shutdown()
+
+        self.test_method.assert_called_once_with(key="Unit-01")
+        expected_method.assert_called_once_with()
+        self.assertEqual(State.PASS, step.state)
+        self.assertFalse(step.repeat)
+
+    def test_run_action_in_executor_with_exception(self):
+        pool = ThreadPoolExecutor(max_workers=1)
+        self.owner.get_executor = MagicMock(return_value=pool)
+        step = Step(self.owner, self.name, Mock(side_effect=IndexError('not found')), executor="thread")
+
+        with self.assertRaises(IndexError):
+            step.run()
+            while step.pending is not None:
+                wait([step.pending])
+                step.run()
+        pool.shutdown()
+
+        self.assertEqual(State.FAIL, step.state)
+
+    def test_compact_representation(self):
+        self.assertFalse(hasattr(self.step, "__dict__"))
+        self.assertEqual([], self.step.collect_warnings())
+        self.step.add_expected(MagicMock(return_value=True), user="user")
+        self.assertFalse(hasattr(self.step._expected[0], "__dict__"))
+        self.assertEqual(1, len(self.step._expected))
+        self.assertEqual((), Step(self.owner, self.name, self.test_method)._expected)
+
+    def test_log_follows_owner(self):
+        owner = Mock()
+        self.step.set_owner(owner)
+        self.assertIs(owner.log, self.step.log)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from io import StringIO
+
+from step_manager import StepManager
+
+
+class TestStepGraph(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sm = StepManager()
+        self.started = list()
+
+    def add(self, name, duration=0.0, **kwargs):
+        return self.sm.add_step(name, action=lambda: self.started.append(name), duration=duration, **kwargs)
+
+    def build(self):
+        self.add("Provision users", duration=2, depends_on=[])
+        self.add("Load dial plan", duration=5, depends_on=[])
+        self.add("Start media", duration=3, depends_on=[])
+        self.add("Call", duration=1, depends_on=["Provision users", "Load dial plan", "Start media"])
+        self.add("Hangup")
+
+    def test_ready_steps_run_concurrently(self):
+        self.build()
+        self.sm.run(virtual=True)
+
+        self.assertTrue(self.sm.completed)
+        self.assertEqual(0, self.sm.find_step("Start media").start_time)
+        self.assertEqual(5, self.sm.find_step("Call").start_time)
+        self.assertEqual(6, self.sm.find_step("Hangup").start_time)
+
+    def test_critical_path(self):
+        self.build()
+        self.sm.run(virtual=True)
+
+        self.assertEqual(["Load dial plan", "Call", "Hangup"], [step.name for step in self.sm.get_critical_path()])
+        stream = StringIO()
+        self.sm.report_critical_path(stream=stream)
+        self.assertIn("Load dial plan started 0.000 finished 5.000 (5.000 seconds)", stream.getvalue())
+
+    def test_dependency_waits_for_substeps(self):
+        self.add("Provision users", depends_on=[])
+        self.sm.add_substep("Provision users", "Create user", duration=4)
+        self.add("Start media", duration=1, depends_on=[])
+        self.add("Call", depends_on=["Provision users"])
+        self.sm.run(virtual=True)
+
+        self.assertEqual(4, self.sm.find_step("Call").start_time)
+
+    def test_unknown_dependency(self):
+        self.add("Call", depends_on=["Provision users"])
+        self.add("Provision users")
+
+        with self.assertRaises(ValueError):
+            self.sm.run(virtual=True)
+
+    def test_linear_critical_path(self):
+        self.add("Provision users", duration=1)
+        self.add("Call")
+        self.sm.run(virtual=True)
+
+        self.assertEqual(["Provision users", "Call"], [step.name for step in self.sm.get_critical_path()])
+
+
+if __name__ == '__main__':
+    unittest.main()
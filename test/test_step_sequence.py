@@ -0,0 +1,137 @@
+import random
+import unittest
+from unittest.mock import Mock
+
+from step_manager._StepSequence import StepSequence
+
+names = ["Shinji", "Asuka", "Rei", "Misato", "Gendo"]
+
+
+def make_step(name):
+    step = Mock()
+    step.name = name
+    return step
+
+
+class TestStepSequence(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.sequence = StepSequence()
+        self.steps = [make_step(name) for name in names]
+        for step in self.steps:
+            self.sequence.append(step)
+
+    def test_order(self):
+        self.assertEqual(self.steps, list(self.sequence))
+        self.assertEqual(list(reversed(self.steps)), list(reversed(self.sequence)))
+        self.assertEqual(len(names), len(self.sequence))
+
+    def test_index(self):
+        for i, step in enumerate(self.steps):
+            self.assertEqual(i, self.sequence.index(step))
+
+    def test_insert(self):
+        after = make_step("Kaworu")
+        before = make_step("Kaworu")
+        self.sequence.insert_after(self.steps[2], after)
+        self.sequence.insert_before(self.steps[0], before)
+
+        self.assertEqual(4, self.sequence.index(after))
+        self.assertEqual([before, after], self.sequence.all("Kaworu"))
+        self.assertIs(before, self.sequence.first("Kaworu"))
+        self.assertIs(after, self.sequence.last("Kaworu"))
+
+    def test_many_inserts_keep_order(self):
+        anchor = self.steps[0]
+        inserted = list()
+        for i in range(100):
+            step = make_step("Ritsuko")
+            self.sequence.insert_after(anchor, step)
+            inserted.insert(0, step)
+
+        self.assertEqual(inserted, self.sequence.all("Ritsuko"))
+        self.assertEqual(self.steps[:1] + inserted + self.steps[1:], list(self.sequence))
+
+    def test_edits_and_lookups_interleaved(self):
+        self.check_edits_and_lookups()
+
+    def test_edits_and_lookups_small_chunks(self):
+        # Chunks and branches are split and emptied often
+        self.sequence.CHUNK = 2
+        self.sequence.FANOUT = 2
+        self.check_edits_and_lookups()
+
+    def check_edits_and_lookups(self):
+        rnd = random.Random(7)
+        expected = list(self.steps)
+        for i in range(2000):
+            step = make_step("Pen-Pen")
+            choice = rnd.random()
+            if choice < 0.3:
+                self.sequence.append(step)
+                expected.append(step)
+            elif choice < 0.6:
+                # Dense inserts at one place force labels to be renumbered
+                anchor = expected[len(expected) // 2]
+                self.sequence.insert_after(anchor, step)
+                expected.insert(expected.index(anchor) + 1, step)
+            elif choice < 0.8:
+                anchor = rnd.choice(expected)
+                self.sequence.insert_before(anchor, step)
+                expected.insert(expected.index(anchor), step)
+            elif len(expected) > 10:
+                start = rnd.randrange(len(expected) - 3)
+                self.sequence.remove_range(expected[start], expected[start + 2])
+                del expected[start:start + 3]
+            probe = rnd.choice(expected)
+            position = expected.index(probe)
+            self.assertEqual(position, self.sequence.index(probe))
+            same_name = [step for step in expected[position:] if step.name == "Pen-Pen"]
+            self.assertEqual(same_name[0] if same_name else None, self.sequence.first_after("Pen-Pen", probe))
+
+        self.assertEqual(expected, list(self.sequence))
+        self.assertEqual(list(range(len(expected))), [self.sequence.index(step) for step in expected])
+        labels = [self.sequence._nodes[step].label for step in expected]
+        self.assertEqual(sorted(set(labels)), labels)
+        self.assertEqual([step for step in expected if step.name == "Pen-Pen"], self.sequence.all("Pen-Pen"))
+
+    def test_refill_after_removing_all(self):
+        self.sequence.CHUNK = 2
+        self.sequence.FANOUT = 2
+        more = [make_step("Toji") for _ in range(20)]
+        for step in more:
+            self.sequence.append(step)
+        self.sequence.remove_range(self.steps[0], more[-1])
+        self.assertEqual(0, len(self.sequence))
+
+        for step in more:
+            self.sequence.append(step)
+        self.assertEqual(list(range(20)), [self.sequence.index(step) for step in more])
+        self.assertIs(more[4], self.sequence.last_before("Toji", more[5]))
+
+    def test_remove_range(self):
+        removed = self.sequence.remove_range(self.steps[1], self.steps[3])
+
+        self.assertEqual(self.steps[1:4], removed)
+        self.assertEqual([self.steps[0], self.steps[4]], list(self.sequence))
+        self.assertIsNone(self.sequence.first("Rei"))
+
+    def test_remove_range_reversed(self):
+        with self.assertRaises(ValueError):
+            self.sequence.remove_range(self.steps[3], self.steps[1])
+
+    def test_splice(self):
+        spliced = [make_step("Maya"), make_step("Makoto")]
+        self.sequence.splice(spliced, after=self.steps[1])
+
+        self.assertEqual(self.steps[:2] + spliced + self.steps[2:], list(self.sequence))
+
+    def test_splice_to_beginning(self):
+        spliced = [make_step("Maya"), make_step("Makoto")]
+        self.sequence.splice(spliced)
+
+        self.assertEqual(spliced + self.steps, list(self.sequence))
+
+
+if __name__ == '__main__':
+    unittest.main()
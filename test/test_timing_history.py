@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from step_manager import ScenarioRunner, StepManager, TimingHistory
+
+
+class TestTimingHistory(unittest.TestCase):
+    def setUp(self) -> None:
+        self.history = TimingHistory(min_runs=2)
+
+    def tearDown(self) -> None:
+        self.history.close()
+
+    def record_runs(self, scenario, seconds, count=3):
+        for _ in range(count):
+            self.history.record(scenario, sum(seconds.values()), [((name,), value) for name, value in seconds.items()])
+
+    def build(self):
+        sm = StepManager()
+        sm.add_step("Register", duration=1)
+        sm.add_step("Call", duration=2)
+        sm.add_substep("Call", "Answer")
+        sm.add_step("Hangup")
+        return sm
+
+    def test_predict(self):
+        sm = self.build()
+        self.assertEqual(3, self.history.predict(sm, "call"))
+
+        self.record_runs("call", {"Register": 4, "Call": 1})
+        self.history.record("call", 5, [(("Call", "Answer"), 2)])
+
+        # Register 4 + 1, Call 1 + Answer 2 + 2, Hangup without history
+        self.assertEqual(10, self.history.predict(sm, "call"))
+
+    def test_predict_dependencies(self):
+        sm = StepManager()
+        sm.add_step("Provision users", depends_on=[])
+        sm.add_step("Load dial plan", depends_on=[])
+        sm.add_step("Call", depends_on=["Provision users", "Load dial plan"])
+        self.record_runs("call", {"Provision users": 2, "Load dial plan": 5, "Call": 1})
+
+        self.assertEqual(6, self.history.predict(sm, "call"))
+
+    def test_baseline_is_median_of_passed_runs(self):
+        for seconds in (1, 2, 10):
+            self.history.record("call", seconds, [(("Call",), seconds)])
+        self.history.record("call", 100, [(("Call",), 100)], passed=False)
+
+        self.assertEqual(2, self.history.scenario_seconds("call"))
+        self.assertEqual(2, self.history.step_seconds("call", ("Call",)))
+        self.assertEqual({"call": 2}, self.history.durations())
+        self.assertIsNone(self.history.scenario_seconds("register"))
+
+    def test_regressions(self):
+        self.record_runs("call", {"Register": 1, "Call": 2})
+
+        regressions = self.history.record("call", 3.1, [(("Register",), 1.1), (("Call",), 2)])
+        self.assertEqual([], regressions)
+
+        regressions = self.history.record("call", 6, [(("Register",), 4), (("Call",), 2)])
+        self.assertEqual([(), ("Register",)], [regression.path for regression in regressions])
+        self.assertEqual(1, regressions[1].baseline)
+
+    def test_persistent(self):
+        fd, path = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        with TimingHistory(path) as history:
+            history.record("call", 3, [(("Call",), 3)])
+        with TimingHistory(path) as history:
+            self.assertEqual(3, history.scenario_seconds("call"))
+
+    def test_scenario_runner(self):
+        self.history.record("short", 1, [])
+        self.history.record("long", 5, [])
+        started = list()
+        runner = ScenarioRunner(concurrency=1, history=self.history)
+        for name in ("short", "unknown", "long"):
+            sm = StepManager()
+            sm.add_step("Call", action=lambda name=name: started.append(name), duration=1)
+            runner.add(sm, name=name)
+        runner.run(virtual=True)
+
+        self.assertEqual(["long", "unknown", "short"], started)
+        self.assertEqual(0, self.history.step_seconds("unknown", ("Call",)))
+        self.assertEqual(1, self.history.scenario_seconds("unknown"))
+
+
+if __name__ == '__main__':
+    unittest.main()
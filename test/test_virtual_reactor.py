@@ -0,0 +1,70 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from step_manager import ScenarioRunner, StepManager, VirtualReactor
+
+
+class TestVirtualReactor(unittest.TestCase):
+
+    def test_call_order(self):
+        reactor = VirtualReactor()
+        calls = list()
+        reactor.call_later(5, lambda r: calls.append(("Asuka", r.seconds())))
+        reactor.call_later(1, lambda r: calls.append(("Shinji", r.seconds())))
+        reactor.call_later(1, lambda r: calls.append(("Rei", r.seconds())))
+
+        reactor.run(timeout=10)
+
+        self.assertEqual([("Shinji", 1), ("Rei", 1), ("Asuka", 5)], calls)
+
+    def test_timeout(self):
+        reactor = VirtualReactor()
+        callback = MagicMock()
+        reactor.call_later(100, callback)
+
+        reactor.run(timeout=10)
+
+        callback.assert_not_called()
+        self.assertEqual(10, reactor.seconds())
+
+    def test_virtual_run(self):
+        sm = StepManager()
+        check = MagicMock(return_value=False)
+        sm.add_step("Misato", duration=600)
+        sm.add_step("Ritsuko", interval=30, attempts=5).add_expected(check)
+        sm.add_substep("Ritsuko", "Maya", duration=1200)
+
+        start = time.time()
+        sm.run(timeout=3600, virtual=True)
+
+        self.assertLess(time.time() - start, 1)
+        self.assertTrue(sm.completed)
+        self.assertEqual(5, check.call_count)
+        ritsuko = sm.find_step("Ritsuko")
+        self.assertEqual(600, ritsuko.start_time)
+        self.assertEqual(120, ritsuko.seconds)
+
+    def test_virtual_timeout(self):
+        sm = StepManager()
+        sm.add_step("Gendo", duration=7200)
+        sm.add_step("Fuyutsuki")
+
+        with self.assertRaises(Exception):
+            sm.run(timeout=3600, virtual=True)
+
+    def test_virtual_scenario_runner(self):
+        runner = ScenarioRunner(timeout=3600)
+        for i in range(10):
+            sm = StepManager()
+            sm.add_step("Wait", duration=60 * (i + 1))
+            runner.add(sm)
+
+        results = runner.run(virtual=True)
+
+        self.assertTrue(all(result.passed for result in results))
+        self.assertEqual(600, results[-1].seconds)
+
+
+if __name__ == '__main__':
+    unittest.main()